@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+def purge_expired_sessions(batch_size):
+    """Delete expired django_session rows a batch at a time, so no single DELETE holds long locks."""
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions, once or every --every seconds as a background worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Sessions deleted per statement')
+        parser.add_argument('--every', type=float, help='Keep running, purging again after this many seconds')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write(self.style.SUCCESS('Sessions live in signed cookies; nothing to purge'))
+            return
+
+        while True:
+            deleted = purge_expired_sessions(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions'))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -1,8 +1,12 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
 
 
 class AdminRedirectMiddleware:
-    """Redirect admin users away from customer-facing pages to the dashboard."""
+    """Redirect admin users away from customer-facing pages to the dashboard.
+
+    Works in both sync and async stacks, so async views stay on the event loop.
+    """
 
     ALLOWED_PREFIXES = (
         '/dashboard/',
@@ -15,16 +19,30 @@ class AdminRedirectMiddleware:
         '/health/',
     )
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if (
-            request.user.is_authenticated
-            and hasattr(request.user, 'is_admin')
-            and request.user.is_admin()
-            and not any(request.path.startswith(p) for p in self.ALLOWED_PREFIXES)
-        ):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.redirects(request.user, request.path):
             return redirect('dashboard:admin_dashboard')
-
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.redirects(await request.auser(), request.path):
+            return redirect('dashboard:admin_dashboard')
+        return await self.get_response(request)
+
+    def redirects(self, user, path):
+        return (
+            user.is_authenticated
+            and hasattr(user, 'is_admin')
+            and user.is_admin()
+            and not any(path.startswith(p) for p in self.ALLOWED_PREFIXES)
+        )
@@ -1,3 +1,93 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ameaozon.middleware import install_query_recording, record_queries
+from store.models import Category, SubCategory, Product
+from .models import User
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    # The manifest only exists after collectstatic
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class SessionTableTests(TestCase):
+    """Browsing reads no sessions from, and writes no messages to, the django_session table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        install_query_recording()
+        category = Category.objects.create(name='Cats', slug='cats')
+        subcategory = SubCategory.objects.create(category=category, name='Cat Food', slug='cat-food')
+        cls.product = Product.objects.create(
+            subcategory=subcategory, name='Tuna Treat', slug='tuna-treat',
+            description='Tuna.', price=Decimal('4.50'), stock=10,
+        )
+        User.objects.create_user('customer', 'customer@example.com', 'pw')
+
+    def setUp(self):
+        # The in-memory cache outlives each test; a cached page would skip the session lookups under test
+        cache.clear()
+
+    def session_queries(self, method, url, data=None):
+        with record_queries(trace=True) as queries:
+            response = getattr(self.client, method)(url, data, secure=True)
+        return response, sum(len(origins) for shape, origins in queries.shapes.items() if 'django_session' in shape)
+
+    def test_anonymous_browsing_skips_session_table(self):
+        for url in [reverse('store:home'), reverse('store:category_detail', args=['cats']),
+                    reverse('store:product_detail', args=['tuna-treat']), reverse('accounts:login')]:
+            with self.subTest(url=url):
+                response, session_queries = self.session_queries('get', url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(session_queries, 0)
+                self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_signed_in_browsing_reads_sessions_from_cache(self):
+        self.client.post(reverse('accounts:login'), {'username': 'customer', 'password': 'pw'}, secure=True)
+        response, session_queries = self.session_queries('get', reverse('store:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_queries, 0)
+        # messages.success() after a POST goes into the messages cookie
+        response, session_queries = self.session_queries('post', reverse('store:add_to_wishlist', args=[self.product.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(session_queries, 0)
+        self.assertIn('messages', response.cookies)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    # The manifest only exists after collectstatic
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class AsyncMiddlewareTests(TestCase):
+    """Under ASGI no middleware is wrapped in sync_to_async, which would serialise requests on one thread."""
+
+    def test_asgi_chain_adapts_no_middleware(self):
+        adapted = []
+
+        def adapt_method_mode(handler, is_async, method, method_is_async=None, debug=False, name=None):
+            if method_is_async is None:
+                method_is_async = iscoroutinefunction(method)
+            if is_async != method_is_async and (name or '').startswith('middleware '):
+                adapted.append(name)
+            return BaseHandler.adapt_method_mode(handler, is_async, method, method_is_async, debug, name)
+
+        with mock.patch.object(ASGIHandler, 'adapt_method_mode', adapt_method_mode):
+            ASGIHandler()
+        self.assertEqual(adapted, [])
+
+    async def test_admin_is_redirected_to_dashboard_under_asgi(self):
+        admin = await User.objects.acreate_user('admin', 'admin@example.com', 'pw', user_type=User.ADMIN)
+        await self.async_client.aforce_login(admin)
+        response = await self.async_client.get(reverse('accounts:login'), secure=True)
+        self.assertRedirects(response, reverse('dashboard:admin_dashboard'), fetch_redirect_response=False)
@@ -0,0 +1,65 @@
+import hmac
+import os
+import socket
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+# (set in gunicorn.conf.py) and a scrape of any worker merges them all.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_LATENCY = Histogram(
+    'ameaozon_request_duration_seconds', 'Request latency by URL name',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_QUERIES = Histogram(
+    'ameaozon_request_db_queries', 'Database queries per request by URL name',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_TIME = Histogram(
+    'ameaozon_request_db_seconds', 'Database time per request by URL name',
+    ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CATALOG_CACHE = Counter(
+    'ameaozon_catalog_cache_lookups_total', 'Catalog cache lookups by entry and result (hit or miss)',
+    ['cache', 'result'],
+)
+CHECKOUTS = Counter('ameaozon_checkouts_total', 'Checkout attempts by outcome', ['outcome'])
+PAYMENTS = Counter('ameaozon_payments_total', 'Payments by method and outcome', ['method', 'outcome'])
+WORKER = Gauge(
+    'ameaozon_worker_info', 'Processes serving requests; a pid label is added per gunicorn worker',
+    ['hostname', 'interface'], multiprocess_mode='liveall',
+)
+
+
+def register_worker():
+    WORKER.labels(socket.gethostname(), os.environ.get('GUNICORN_INTERFACE', 'dev')).set(1)
+
+
+def record_cache_lookup(cache, hit):
+    CATALOG_CACHE.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def metrics_view(request):
+    """Every metric in the Prometheus text exposition format.
+
+    Meant to be scraped inside the private network: nginx refuses /metrics/
+    from outside, and METRICS_TOKEN, when set, must be sent as a bearer token.
+    """
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            return HttpResponseForbidden()
+
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
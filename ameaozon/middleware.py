@@ -0,0 +1,240 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Node
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import REQUEST_DB_TIME, REQUEST_LATENCY, REQUEST_QUERIES, register_worker
+
+logger = logging.getLogger('ameaozon.queries')
+
+# IN (%s, %s, ...) lists and inline numbers vary between otherwise identical queries
+_IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_RENDER_CODE = Node.render_annotated.__code__
+_THIS_FILE = os.path.abspath(__file__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its QUERY_BUDGETS entry allows."""
+
+
+def fingerprint(sql):
+    """The shape of a query with its variable parts removed."""
+    return _NUMBER_RE.sub('N', _IN_LIST_RE.sub('(...)', sql))
+
+
+def _origin():
+    """Where the current query came from: the innermost template line and project code line."""
+    template = code = None
+    frame = sys._getframe(2)
+    while frame is not None and not (template and code):
+        if template is None and frame.f_code is _RENDER_CODE:
+            node = frame.f_locals['self']
+            if node.origin is not None:
+                template = f'{node.origin.template_name or node.origin.name}:{node.token.lineno}'
+        elif code is None:
+            filename = frame.f_code.co_filename
+            if (filename.startswith(str(settings.BASE_DIR)) and filename != _THIS_FILE
+                    and 'site-packages' not in filename):
+                code = f'{os.path.relpath(filename, settings.BASE_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ' via '.join(part for part in (template, code) if part) or 'unknown'
+
+
+class QueryRecorder:
+    """Query count, database time and, with ``trace``, each query's shape and origin."""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = defaultdict(list)
+
+    def add(self, sql, duration, origin):
+        self.count += 1
+        self.duration += duration
+        if self.trace:
+            self.shapes[fingerprint(sql)].append(origin)
+
+    def repeated(self, threshold):
+        """(shape, origins) for every query shape run at least ``threshold`` times."""
+        return [(shape, origins) for shape, origins in self.shapes.items() if len(origins) >= threshold]
+
+
+# Recorders for the request being handled. A context variable follows the
+# request into the threads async views run ORM calls in, where a per-connection
+# execute_wrapper() block would miss them.
+_recorders = ContextVar('query_recorders', default=())
+
+
+def _record(execute, sql, params, many, context):
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        origin = _origin() if any(recorder.trace for recorder in recorders) else None
+        for recorder in recorders:
+            recorder.add(sql, duration, origin)
+
+
+def _install(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def install_query_recording():
+    """Route every connection's queries through _record(), including ones opened later."""
+    connection_created.connect(_install, dispatch_uid='ameaozon.middleware.install')
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+@contextmanager
+def record_queries(trace=False):
+    recorder = QueryRecorder(trace)
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _recorders.reset(token)
+
+
+class RecordingMiddleware:
+    """Base for middleware that looks at a request's queries once it has been handled.
+
+    Works in both sync and async stacks, so async views stay on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+    trace = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_query_recording()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with record_queries(self.trace) as recorder:
+            response = self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with record_queries(self.trace) as recorder:
+            response = await self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def report(self, request, response, recorder, elapsed):
+        raise NotImplementedError
+
+
+def _view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else None
+
+
+class MetricsMiddleware(RecordingMiddleware):
+    """Feed request latency and database use into ameaozon.metrics, labelled by URL name.
+
+    Enabled by METRICS_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        register_worker()
+
+    def report(self, request, response, recorder, elapsed):
+        view = _view_name(request) or 'unresolved'
+        REQUEST_LATENCY.labels(view, request.method, f'{response.status_code // 100}xx').observe(elapsed)
+        REQUEST_QUERIES.labels(view).observe(recorder.count)
+        REQUEST_DB_TIME.labels(view).observe(recorder.duration)
+
+
+class QueryBudgetMiddleware(RecordingMiddleware):
+    """Count queries and database time per request, flag N+1 patterns and enforce budgets.
+
+    Enabled by QUERY_BUDGET_ENABLED. Every request logs its query count and
+    time to the ``ameaozon.queries`` logger; a query shape repeated
+    QUERY_BUDGET_REPEAT_THRESHOLD times is reported as a likely N+1 along
+    with the template line or code that ran it. Views over their
+    QUERY_BUDGETS entry (keyed by URL name, falling back to
+    QUERY_BUDGET_DEFAULT) log an error, or raise QueryBudgetExceeded when
+    QUERY_BUDGET_RAISE is set so tests fail.
+    """
+
+    trace = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def report(self, request, response, recorder, elapsed):
+        view_name = _view_name(request)
+        label = f'{request.method} {request.path} ({view_name or "unresolved"})'
+        logger.info('%s: %d queries in %.1f ms', label, recorder.count, recorder.duration * 1000)
+
+        for shape, origins in recorder.repeated(settings.QUERY_BUDGET_REPEAT_THRESHOLD):
+            culprit = max(set(origins), key=origins.count)
+            logger.warning('Possible N+1 in %s: %d x %s (from %s)', label, len(origins), shape, culprit)
+
+        budget = settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+        if budget is not None and recorder.count > budget:
+            message = f'{label} ran {recorder.count} queries, over its budget of {budget}'
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also runs in async stacks.
+
+    WhiteNoiseMiddleware is sync-only, so under ASGI Django would push every
+    request below it, async views included, through the thread-sensitive
+    executor one at a time. Looking a path up is an in-memory dict hit (a
+    stat in autorefresh dev mode); only serving a file leaves the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
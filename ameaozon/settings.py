@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Choices, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,8 +51,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so they time and count the queries of every other middleware too
+    'ameaozon.middleware.MetricsMiddleware',
+    'ameaozon.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, made async-capable so ASGI requests stay on the event loop
+    'ameaozon.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,9 +81,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 # custom
                 'store.context_processors.categories',
-                'store.context_processors.cart_count',
-                'store.context_processors.cart_items_map',
-                'store.context_processors.wishlist_ids',
+                'store.context_processors.shopper',
             ],
         },
     },
@@ -94,10 +96,58 @@ WSGI_APPLICATION = 'ameaozon.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=config('DATABASE_URL', default=f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
-        conn_max_age=600,
+        conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
     )
 }
 
+# A connection pool per process (psycopg 3) for servers that cannot keep a
+# connection between requests, such as the ASGI workers gunicorn.conf.py runs.
+# Pooled connections are returned after every request, so CONN_MAX_AGE must be 0.
+if config('DB_POOL', default=False, cast=bool) and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        # Seconds a request waits for a free connection before failing
+        'timeout': 10,
+    }
+
+
+# Cache
+# Shared across all gunicorn workers: Redis when REDIS_URL is set, otherwise
+# a file-based cache on local disk (what dev runs use). Tests override it
+# with LocMemCache so fragments cached from dev data never leak in.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'ameaozon',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / '.cache')),
+            'KEY_PREFIX': 'ameaozon',
+        }
+    }
+
+# Sessions and messages
+# "cached_db" (default) reads sessions from the cache above and only touches
+# the django_session table to save them or on a cache miss; "signed_cookies"
+# keeps sessions out of the database entirely, but a stolen cookie cannot be
+# revoked server-side before it expires. purge_sessions deletes expired rows.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + config(
+    'SESSION_BACKEND', default='cached_db', cast=Choices(['db', 'cached_db', 'signed_cookies'])
+)
+# Messages go in their own cookie and only spill into the session when too
+# big for it, so flashing one after a POST writes no session row.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,7 +185,8 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STORAGES = {
     'default': {
-        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        # Uploads are named by content hash so nginx can cache /media/ as immutable
+        'BACKEND': 'ameaozon.storage.ContentAddressedStorage',
     },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
@@ -146,6 +197,11 @@ STORAGES = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# On-demand resizes at /media/resize/<width>/<path>; only these widths are rendered
+IMAGE_RESIZE_WIDTHS = [120, 240, 320, 480, 640, 800, 1024, 1280, 1600]
+IMAGE_RESIZE_ROOT = MEDIA_ROOT / 'resize'
+IMAGE_RESIZE_CACHE_MAX_BYTES = config('IMAGE_RESIZE_CACHE_MB', default=512, cast=int) * 1024 * 1024
+
 # Authentication settings
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -166,6 +222,36 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
+# Metrics (ameaozon.metrics), scraped from /metrics/ inside the private network
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# When set, scrapes must send "Authorization: Bearer <token>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Query budgets (ameaozon.middleware.QueryBudgetMiddleware)
+# Off by default; set QUERY_BUDGET_ENABLED=True in development and tests.
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=False, cast=bool)
+# Raise QueryBudgetExceeded instead of logging an error, so over-budget views fail tests
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=False, cast=bool)
+# Same query shape this many times in one request is reported as a likely N+1
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+# Maximum queries per request, by URL name; other views get QUERY_BUDGET_DEFAULT
+QUERY_BUDGET_DEFAULT = 30
+QUERY_BUDGETS = {
+    'store:home': 8,
+    'store:category_detail': 10,
+    'store:subcategory_detail': 10,
+    'store:product_detail': 12,
+    'store:search': 8,
+    'store:wishlist': 8,
+    'orders:cart_detail': 10,
+    # Placing an order also moves the sales rollups and tallies, a set-based statement each
+    'orders:checkout': 20,
+    'accounts:customer_dashboard': 10,
+    'dashboard:admin_dashboard': 15,
+    'dashboard:product_list': 6,
+    'dashboard:order_list': 6,
+}
+
 # Logging
 LOGGING = {
     'version': 1,
@@ -192,5 +278,10 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        'ameaozon.queries': {
+            'handlers': ['console'],
+            'level': config('QUERY_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,43 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 32
+HASHED_NAME_RE = re.compile(rf'(^|/)[0-9a-f]{{{HASH_LENGTH}}}\.[A-Za-z0-9]+$')
+
+
+def is_content_addressed(name):
+    """Whether ``name`` was produced by ContentAddressedStorage and so never changes."""
+    return bool(HASHED_NAME_RE.search(name or ''))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names every file after a hash of its bytes.
+
+    ``products/kibble.jpg`` is stored as ``products/<sha256 prefix>.jpg``:
+    uploading the same bytes twice reuses the existing file, and a name can
+    never point at different content, so media can be cached as immutable.
+    Because files may be shared between objects, deleting one is left to
+    the prune_media command rather than individual model saves.
+    """
+
+    content_addressed = True
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest.hexdigest()[:HASH_LENGTH] + extension)
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        # A concurrent upload of the same bytes makes this fall back to a suffixed name
+        return super()._save(name, content)
@@ -4,9 +4,11 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 from accounts.views import admin_login_view
+from .metrics import metrics_view
 
 urlpatterns = [
     path('health/', lambda request: JsonResponse({'status': 'ok'})),
+    path('metrics/', metrics_view, name='metrics'),
     path('staff/login/', admin_login_view, name='admin_login'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
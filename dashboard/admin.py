@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import SalesRollup, OrderStatusTally, ProductSalesTally
 
-# Register your models here.
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['period_start', 'granularity', 'orders', 'items_sold', 'paid_orders', 'revenue']
+    list_filter = ['granularity']
+
+class OrderStatusTallyAdmin(admin.ModelAdmin):
+    list_display = ['status', 'count']
+
+class ProductSalesTallyAdmin(admin.ModelAdmin):
+    list_display = ['product', 'order_count', 'units_sold']
+    raw_id_fields = ['product']
+
+admin.site.register(SalesRollup, SalesRollupAdmin)
+admin.site.register(OrderStatusTally, OrderStatusTallyAdmin)
+admin.site.register(ProductSalesTally, ProductSalesTallyAdmin)
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import inlineformset_factory
 from store.models import Category, SubCategory, Product, ProductImage, CarouselImage
+from orders.models import Order
 
 class CategoryForm(forms.ModelForm):
     class Meta:
@@ -35,6 +36,11 @@ class ProductForm(forms.ModelForm):
             'image': forms.FileInput(attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Each option's label names its category
+        self.fields['subcategory'].queryset = SubCategory.objects.select_related('category')
+
     def clean_price(self):
         price = self.cleaned_data.get('price')
         if price is not None and price < 0:
@@ -74,4 +80,24 @@ class CarouselImageForm(forms.ModelForm):
             'subtitle': forms.TextInput(attrs={'class': 'form-control'}),
             'link': forms.URLInput(attrs={'class': 'form-control'}),
             'order': forms.NumberInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+class CatalogImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV or JSON Lines with name, subcategory, price, stock, description, slug, is_available and image.",
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.jsonl,.ndjson'}),
+    )
+
+
+class OrderExportForm(forms.Form):
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    status = forms.MultipleChoiceField(required=False, choices=Order.STATUS_CHOICES)
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], initial='csv')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and end < start:
+            raise forms.ValidationError("The end date must not be before the start date.")
+        return cleaned_data
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from orders.models import Order
+from dashboard.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, date_bounds, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream orders and their items as CSV or NDJSON, filtered by date range and status'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First order date to include (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last order date to include (YYYY-MM-DD)')
+        parser.add_argument('--status', action='append', choices=[value for value, _ in Order.STATUS_CHOICES],
+                            help='Only export orders in this status; repeat for several')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        start_date = self._date(options['start'], '--start')
+        end_date = self._date(options['end'], '--end')
+        start, end = date_bounds(start_date, end_date)
+        rows = export_rows(start, end, options['status'], chunk_size=options['chunk_size'])
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        lines = 0
+        try:
+            for line in iter_export(options['format'], rows):
+                output.write(line)
+                lines += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['output']:
+            # The CSV header is not a row
+            rows_written = lines - 1 if options['format'] == 'csv' else lines
+            self.stdout.write(self.style.SUCCESS(f"Exported {rows_written} rows to {options['output']}"))
+
+    def _date(self, value, flag):
+        if value is None:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'{flag} must be a date in YYYY-MM-DD format')
+        return day
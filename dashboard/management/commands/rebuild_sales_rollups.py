@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from dashboard.models import SalesRollup, OrderStatusTally, ProductSalesTally
+from orders.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard sales rollup tables from the full order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        paid = Q(payment_completed=True)
+        # Cancelled orders still count as placed, but their items were never sold
+        sold_items = OrderItem.objects.exclude(order__status='cancelled')
+
+        with transaction.atomic():
+            SalesRollup.objects.all().delete()
+            OrderStatusTally.objects.all().delete()
+            ProductSalesTally.objects.all().delete()
+
+            for granularity, trunc in ((SalesRollup.HOUR, TruncHour), (SalesRollup.DAY, TruncDay)):
+                items_sold = dict(
+                    sold_items.annotate(period=trunc('order__created_at'))
+                    .values('period').order_by()
+                    .annotate(units=Sum('quantity'))
+                    .values_list('period', 'units')
+                )
+                periods = (
+                    Order.objects.annotate(period=trunc('created_at'))
+                    .values('period').order_by()
+                    .annotate(
+                        orders=Count('id'),
+                        paid_orders=Count('id', filter=paid),
+                        revenue=Coalesce(Sum('total_price', filter=paid), Value(0), output_field=DecimalField()),
+                    )
+                )
+                SalesRollup.objects.bulk_create(
+                    (
+                        SalesRollup(
+                            granularity=granularity,
+                            period_start=row['period'],
+                            orders=row['orders'],
+                            items_sold=items_sold.get(row['period'], 0),
+                            paid_orders=row['paid_orders'],
+                            revenue=row['revenue'],
+                        )
+                        for row in periods.iterator(chunk_size=batch_size)
+                    ),
+                    batch_size=batch_size,
+                )
+
+            OrderStatusTally.objects.bulk_create([
+                OrderStatusTally(status=row['status'], count=row['count'])
+                for row in Order.objects.values('status').order_by().annotate(count=Count('id'))
+            ])
+
+            ProductSalesTally.objects.bulk_create(
+                (
+                    ProductSalesTally(product_id=row['product'], order_count=row['orders'], units_sold=row['units'])
+                    for row in sold_items.values('product').order_by()
+                    .annotate(orders=Count('id'), units=Sum('quantity')).iterator(chunk_size=batch_size)
+                ),
+                batch_size=batch_size,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {SalesRollup.objects.count()} sales rollups and '
+            f'{ProductSalesTally.objects.count()} product tallies'
+        ))
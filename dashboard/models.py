@@ -1,3 +1,49 @@
 from django.db import models
+from store.models import Product
 
-# Create your models here.
+
+class SalesRollup(models.Model):
+    """Pre-aggregated order figures for one hour or one day, bucketed by order creation time."""
+
+    HOUR = 'hour'
+    DAY = 'day'
+
+    GRANULARITY_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    orders = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+    paid_orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('granularity', 'period_start')
+        ordering = ['-period_start']
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} from {self.period_start:%Y-%m-%d %H:%M}"
+
+
+class OrderStatusTally(models.Model):
+    """Running number of orders currently in each status."""
+
+    status = models.CharField(max_length=20, unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class ProductSalesTally(models.Model):
+    """Running number of orders and units sold for a product."""
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='sales_tally')
+    order_count = models.IntegerField(default=0, db_index=True)
+    units_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product.name}: {self.order_count} orders"
@@ -0,0 +1,142 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from orders.models import OrderItem
+
+from .models import SalesRollup, OrderStatusTally, ProductSalesTally
+
+# Orders in this status no longer count towards items sold or product tallies
+CANCELLED = 'cancelled'
+
+
+def _periods(moment):
+    """The (granularity, period_start) buckets an order created at ``moment`` falls into."""
+    local = timezone.localtime(moment)
+    hour = local.replace(minute=0, second=0, microsecond=0)
+    return [
+        (SalesRollup.HOUR, hour),
+        (SalesRollup.DAY, hour.replace(hour=0)),
+    ]
+
+
+def _increment(model, keys, **deltas):
+    """Add ``deltas`` to every row identified by ``keys``, creating missing rows first.
+
+    Two statements regardless of how many rows: an INSERT that skips rows that
+    already exist, then one UPDATE of F() increments, so concurrent writers
+    never lose counts.
+    """
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    model.objects.filter(reduce(or_, [Q(**key) for key in keys])).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def _increment_sales(order, **deltas):
+    _increment(
+        SalesRollup,
+        [{'granularity': granularity, 'period_start': start} for granularity, start in _periods(order.created_at)],
+        **deltas,
+    )
+
+
+def _shift_statuses(moves):
+    """Apply ``{status: delta}`` to the status tallies in one UPDATE."""
+    moves = {status: delta for status, delta in moves.items() if delta}
+    if not moves:
+        return
+    OrderStatusTally.objects.bulk_create(
+        [OrderStatusTally(status=status) for status in moves], ignore_conflicts=True
+    )
+    OrderStatusTally.objects.filter(status__in=moves).update(count=F('count') + Case(
+        *[When(status=status, then=Value(delta)) for status, delta in moves.items()],
+        output_field=IntegerField(),
+    ))
+
+
+def record_order_created(order):
+    paid = order.payment_completed
+    _increment_sales(order, orders=1, paid_orders=int(paid), revenue=order.total_price if paid else 0)
+    _shift_statuses({order.status: 1})
+
+
+def record_order_changed(order, old_status, old_paid):
+    if order.status != old_status:
+        _shift_statuses({old_status: -1, order.status: 1})
+        if CANCELLED in (order.status, old_status):
+            shift_items_sold([order.pk], -1 if order.status == CANCELLED else 1)
+    if order.payment_completed != old_paid:
+        sign = 1 if order.payment_completed else -1
+        _increment_sales(order, paid_orders=sign, revenue=sign * order.total_price)
+
+
+def record_order_deleted(order):
+    paid = order.payment_completed
+    _increment_sales(order, orders=-1, paid_orders=-int(paid), revenue=-order.total_price if paid else 0)
+    _shift_statuses({order.status: -1})
+
+
+def record_items_sold(order, items):
+    """Count a newly placed order's items towards its sales buckets and per-product tallies."""
+    units = {}
+    for item in items:
+        units[item.product_id] = units.get(item.product_id, 0) + item.quantity
+    if not units:
+        return
+    _increment_sales(order, items_sold=sum(units.values()))
+    ProductSalesTally.objects.bulk_create(
+        [ProductSalesTally(product_id=product_id) for product_id in units], ignore_conflicts=True
+    )
+    ProductSalesTally.objects.filter(product_id__in=units).update(
+        order_count=F('order_count') + 1,
+        units_sold=F('units_sold') + Case(
+            *[When(product_id=product_id, then=Value(qty)) for product_id, qty in units.items()],
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def shift_items_sold(order_ids, sign):
+    """Take the items of ``order_ids`` out of (``sign=-1``) or back into their sales buckets and product tallies.
+
+    For orders being cancelled, un-cancelled or deleted; a handful of
+    set-based statements however many orders and items are involved.
+    ``order_ids`` may be a list or a ``values('pk')`` queryset.
+    """
+    items = OrderItem.objects.filter(order_id__in=order_ids).order_by()
+    per_product = list(
+        items.values('product_id')
+        .annotate(orders=Count('order_id', distinct=True), units=Sum('quantity'))
+        .values_list('product_id', 'orders', 'units')
+    )
+    if not per_product:
+        return
+    ProductSalesTally.objects.filter(product_id__in=[product_id for product_id, _, _ in per_product]).update(
+        order_count=F('order_count') + Case(
+            *[When(product_id=product_id, then=Value(sign * orders)) for product_id, orders, _ in per_product],
+            output_field=IntegerField(),
+        ),
+        units_sold=F('units_sold') + Case(
+            *[When(product_id=product_id, then=Value(sign * units)) for product_id, _, units in per_product],
+            output_field=IntegerField(),
+        ),
+    )
+    for granularity, trunc in ((SalesRollup.HOUR, TruncHour), (SalesRollup.DAY, TruncDay)):
+        per_period = list(
+            items.annotate(period=trunc('order__created_at'))
+            .values('period').annotate(units=Sum('quantity')).values_list('period', 'units')
+        )
+        SalesRollup.objects.filter(granularity=granularity, period_start__in=[period for period, _ in per_period]).update(
+            items_sold=F('items_sold') + Case(
+                *[When(period_start=period, then=Value(sign * units)) for period, units in per_period],
+                output_field=IntegerField(),
+            ),
+        )
+
+
+def record_status_changes(moves):
+    """Apply ``{status: delta}`` tallies for orders moved with QuerySet.update(), which skips signals."""
+    _shift_statuses(moves)
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from orders.models import Order
+from orders.signals import order_placed
+from . import rollups
+
+
+@receiver(post_save, sender=Order)
+def track_order_save(sender, instance, created, raw=False, **kwargs):
+    """Fold order creation, status and payment changes into the rollup tables."""
+    if raw:
+        return
+    if created:
+        rollups.record_order_created(instance)
+    else:
+        loaded = getattr(instance, '_loaded_values', None)
+        if loaded is None or 'status' not in loaded or 'payment_completed' not in loaded:
+            return
+        rollups.record_order_changed(instance, loaded['status'], loaded['payment_completed'])
+    instance._loaded_values = {
+        **getattr(instance, '_loaded_values', {}),
+        'status': instance.status,
+        'payment_completed': instance.payment_completed,
+    }
+
+
+@receiver(pre_delete, sender=Order)
+def untrack_deleted_order_items(sender, instance, **kwargs):
+    # Before the cascade, while the order's items still exist
+    if instance.status != rollups.CANCELLED:
+        rollups.shift_items_sold([instance.pk], -1)
+
+
+@receiver(post_delete, sender=Order)
+def track_order_delete(sender, instance, **kwargs):
+    rollups.record_order_deleted(instance)
+
+
+@receiver(order_placed)
+def track_items_sold(sender, order, items, **kwargs):
+    rollups.record_items_sold(order, items)
@@ -1,3 +1,154 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from orders.models import Order, OrderItem
+from orders.signals import order_placed
+from store.models import Category, SubCategory, Product
+from .models import SalesRollup, OrderStatusTally, ProductSalesTally
+
+
+def rollup_state():
+    """Every non-zero rollup and tally row, in a comparable form."""
+    return {
+        'sales': sorted(
+            (row.granularity, row.period_start, row.orders, row.items_sold, row.paid_orders, row.revenue)
+            for row in SalesRollup.objects.all()
+            if row.orders or row.items_sold or row.paid_orders or row.revenue
+        ),
+        'statuses': sorted(OrderStatusTally.objects.exclude(count=0).values_list('status', 'count')),
+        'products': sorted(
+            ProductSalesTally.objects.exclude(order_count=0, units_sold=0).values_list('product_id', 'order_count', 'units_sold')
+        ),
+    }
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    # The manifest only exists after collectstatic
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class OrderTestCase(TestCase):
+    """Two products, a customer who orders them and an admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Cats', slug='cats')
+        subcategory = SubCategory.objects.create(category=category, name='Cat Food', slug='cat-food')
+        cls.tuna, cls.salmon = [
+            Product.objects.create(subcategory=subcategory, name=name, slug=slug, price=Decimal('4.50'), stock=100)
+            for name, slug in [('Tuna Treat', 'tuna-treat'), ('Salmon Bites', 'salmon-bites')]
+        ]
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pw')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', user_type=User.ADMIN)
+
+    def place(self, quantities):
+        """Create an order the way checkout does, with ``{product: qty}`` items."""
+        order = Order.objects.create(
+            user=self.customer, first_name='Test', last_name='Customer', email='customer@example.com',
+            phone='01712345678', address='House 1', city='Dhaka', postal_code='1207', payment_method='card',
+            total_price=sum(product.price * qty for product, qty in quantities.items()),
+        )
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, price=product.price, quantity=qty)
+            for product, qty in quantities.items()
+        ])
+        order_placed.send(sender=Order, order=order, items=items)
+        return Order.objects.get(pk=order.pk)
+
+
+class SalesRollupTests(OrderTestCase):
+    """The incrementally maintained rollups always equal what rebuild_sales_rollups computes from scratch."""
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_state()
+        with transaction.atomic():
+            call_command('rebuild_sales_rollups', stdout=StringIO())
+            rebuilt = rollup_state()
+            transaction.set_rollback(True)
+        self.assertEqual(incremental, rebuilt)
+
+    def test_rollups_follow_every_order_transition(self):
+        first = self.place({self.tuna: 2, self.salmon: 1})
+        second = self.place({self.tuna: 3})
+        self.assertMatchesRebuild()
+        self.assertEqual(ProductSalesTally.objects.get(product=self.tuna).units_sold, 5)
+
+        first.payment_completed = True
+        first.status = 'processing'
+        first.save()
+        self.assertMatchesRebuild()
+
+        second.status = 'cancelled'
+        second.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(ProductSalesTally.objects.get(product=self.tuna).units_sold, 2)
+
+        first.delete()
+        self.assertMatchesRebuild()
+
+        # Deleting a cancelled order must not take its items out a second time
+        second.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(rollup_state(), {'sales': [], 'statuses': [], 'products': []})
+
+    def test_rollups_follow_bulk_status_updates(self):
+        orders = [self.place({self.tuna: 1, self.salmon: n}) for n in range(1, 4)]
+        self.client.force_login(self.admin)
+        for status in ['processing', 'cancelled']:
+            response = self.client.post(reverse('dashboard:bulk_update_order_status'), {
+                'status': status, 'order_ids': [str(order.pk) for order in orders[:2]],
+            }, secure=True)
+            self.assertEqual(response.status_code, 302)
+            self.assertMatchesRebuild()
+        self.assertEqual(ProductSalesTally.objects.get(product=self.salmon).units_sold, 3)
+
+
+class BulkOrderStatusTests(OrderTestCase):
+    """Bulk status changes follow STATUS_TRANSITIONS and return to the list the admin came from."""
+
+    def bulk_update(self, data):
+        self.client.force_login(self.admin)
+        return self.client.post(reverse('dashboard:bulk_update_order_status'), data, secure=True)
+
+    def test_select_all_moves_every_order_matching_the_filter(self):
+        # More than one page of the order list
+        pending = [self.place({self.tuna: 1}) for _ in range(25)]
+        shipped = self.place({self.tuna: 1})
+        shipped.status = 'shipped'
+        shipped.save()
+
+        response = self.bulk_update({
+            'status': 'processing', 'select_all': '1', 'filter_status': 'pending',
+            'query': 'status=pending&cursor=abc', 'order_ids': [str(pending[0].pk)],
+        })
+        self.assertRedirects(response, reverse('dashboard:order_list') + '?status=pending&cursor=abc', fetch_redirect_response=False)
+        self.assertEqual(Order.objects.filter(status='processing').count(), 25)
+        self.assertEqual(Order.objects.get(pk=shipped.pk).status, 'shipped')
+        self.assertEqual(dict(OrderStatusTally.objects.values_list('status', 'count')), {'pending': 0, 'processing': 25, 'shipped': 1})
+
+    def test_orders_that_cannot_make_the_move_are_skipped(self):
+        orders = [self.place({self.tuna: 1}) for _ in range(3)]
+        orders[0].status = 'delivered'
+        orders[0].save()
+
+        response = self.bulk_update({'status': 'cancelled', 'order_ids': [str(order.pk) for order in orders], 'query': 'cursor=abc'})
+        self.assertRedirects(response, reverse('dashboard:order_list') + '?cursor=abc', fetch_redirect_response=False)
+        self.assertEqual(
+            dict(Order.objects.values_list('pk', 'status')),
+            {orders[0].pk: 'delivered', orders[1].pk: 'cancelled', orders[2].pk: 'cancelled'},
+        )
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(messages, ['2 order(s) moved to "Cancelled".', '1 order(s) skipped: they cannot move to "Cancelled" from their current status.'])
+
+    def test_without_a_query_string_returns_to_the_plain_list(self):
+        order = self.place({self.tuna: 1})
+        response = self.bulk_update({'status': 'processing', 'order_ids': [str(order.pk)]})
+        self.assertRedirects(response, reverse('dashboard:order_list'), fetch_redirect_response=False)
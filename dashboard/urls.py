@@ -13,13 +13,18 @@ urlpatterns = [
     path('subcategories/edit/<int:subcategory_id>/', views.subcategory_edit, name='subcategory_edit'),
     path('products/', views.product_list, name='product_list'),
     path('products/add/', views.product_add, name='product_add'),
+    path('products/import/', views.product_import, name='product_import'),
     path('products/edit/<int:product_id>/', views.product_edit, name='product_edit'),
     path('orders/', views.order_list, name='order_list'),
+    path('orders/export/', views.order_export, name='order_export'),
+    path('orders/bulk-status/', views.bulk_update_order_status, name='bulk_update_order_status'),
     path('orders/<str:tracking_number>/', views.order_detail, name='order_detail'),
     path('orders/update-status/<str:tracking_number>/', views.update_order_status, name='update_order_status'),
     path('carousel/', views.carousel_list, name='carousel_list'),
     path('carousel/add/', views.carousel_add, name='carousel_add'),
     path('carousel/edit/<int:image_id>/', views.carousel_edit, name='carousel_edit'),
     path('carousel/toggle-active/<int:image_id>/', views.carousel_toggle_active, name='carousel_toggle_active'),
-    path('carousel/delete/<int:image_id>/', views.carousel_delete, name='carousel_delete')
+    path('carousel/delete/<int:image_id>/', views.carousel_delete, name='carousel_delete'),
+    path('image-jobs/', views.image_job_list, name='image_job_list'),
+    path('image-jobs/retry/', views.image_job_retry, name='image_job_retry'),
 ]
\ No newline at end of file
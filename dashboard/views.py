@@ -1,14 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Sum, Count
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.urls import reverse
 from django.utils.text import slugify
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.http import require_POST
 from accounts.models import User
-from store.models import Category, SubCategory, Product, ProductImage, Review, CarouselImage
+from store.models import Category, SubCategory, Product, ProductImage, Review, CarouselImage, ImageJob
+from store.image_jobs import retry_failed
+from store.pagination import CursorPaginator
+from store.catalog_import import guess_format, import_catalog, open_upload, read_records
 from orders.models import Order, OrderItem
-from .forms import CategoryForm, SubCategoryForm, ProductForm, ProductImageFormSet, CarouselImageForm
+from .models import SalesRollup, OrderStatusTally
+from .rollups import record_status_changes, shift_items_sold
+from .forms import CategoryForm, SubCategoryForm, ProductForm, ProductImageFormSet, CarouselImageForm, OrderExportForm, CatalogImportForm
+from .exports import EXPORT_FORMATS, aiter_export, date_bounds, export_rows, iter_export
 from .decorators import admin_required
 
 
@@ -16,19 +26,21 @@ from .decorators import admin_required
 @admin_required
 def admin_dashboard(request):
     """Admin overview with order stats, revenue, and popular products."""
-    total_orders = Order.objects.count()
-    pending_orders = Order.objects.filter(status='pending').count()
-    completed_orders = Order.objects.filter(status='delivered').count()
+    # Order figures come from the rollup tables kept current by dashboard.signals
+    status_counts = dict(OrderStatusTally.objects.values_list('status', 'count'))
+    total_orders = sum(status_counts.values())
+    pending_orders = status_counts.get('pending', 0)
+    completed_orders = status_counts.get('delivered', 0)
     total_customers = User.objects.filter(user_type=User.CUSTOMER).count()
     total_products = Product.objects.count()
-    total_revenue = Order.objects.filter(payment_completed=True).aggregate(Sum('total_price'))['total_price__sum'] or 0
+    total_revenue = SalesRollup.objects.filter(granularity=SalesRollup.DAY).aggregate(Sum('revenue'))['revenue__sum'] or 0
     
     # Get recent orders
-    recent_orders = Order.objects.all().order_by('-created_at')[:5]
+    recent_orders = Order.objects.select_related('user').order_by('-created_at')[:5]
     
     # Get popular products (most ordered)
-    popular_products = Product.objects.annotate(
-        order_count=Count('orderitem')
+    popular_products = Product.objects.filter(sales_tally__order_count__gt=0).select_related('subcategory').annotate(
+        order_count=F('sales_tally__order_count')
     ).order_by('-order_count')[:5]
     
     context = {
@@ -47,13 +59,13 @@ def admin_dashboard(request):
 @admin_required
 def category_list(request):
     """Paginated list of all categories."""
-    categories_qs = Category.objects.all().order_by('-created_at')
-    paginator = Paginator(categories_qs, 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    categories_qs = Category.objects.annotate(subcategory_count=Count('subcategories'))
+    paginator = CursorPaginator(categories_qs, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'categories': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
     return render(request, 'dashboard/category_list.html', context)
 
@@ -110,13 +122,13 @@ def category_edit(request, category_id):
 @admin_required
 def subcategory_list(request):
     """Paginated list of all subcategories."""
-    subcategories_qs = SubCategory.objects.all().order_by('-created_at')
-    paginator = Paginator(subcategories_qs, 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    subcategories_qs = SubCategory.objects.select_related('category').annotate(product_count=Count('products'))
+    paginator = CursorPaginator(subcategories_qs, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'subcategories': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
     return render(request, 'dashboard/subcategory_list.html', context)
 
@@ -173,13 +185,13 @@ def subcategory_edit(request, subcategory_id):
 @admin_required
 def product_list(request):
     """Paginated list of all products with category info."""
-    products_qs = Product.objects.select_related('subcategory__category').all().order_by('-created_at')
-    paginator = Paginator(products_qs, 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    products_qs = Product.objects.select_related('subcategory__category').all()
+    paginator = CursorPaginator(products_qs, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'products': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
     return render(request, 'dashboard/product_list.html', context)
 
@@ -217,6 +229,36 @@ def product_add(request):
     }
     return render(request, 'dashboard/product_form.html', context)
 
+@login_required
+@admin_required
+def product_import(request):
+    """Create or update products in bulk from an uploaded CSV or JSON Lines catalog."""
+    result = None
+    if request.method == 'POST':
+        form = CatalogImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            records = read_records(open_upload(upload), guess_format(upload.name))
+            try:
+                result = import_catalog(records)
+            except UnicodeDecodeError:
+                messages.error(request, 'The catalog file must be UTF-8 encoded.')
+            else:
+                messages.success(
+                    request,
+                    f'Catalog imported: {result.created} created, {result.updated} updated, {len(result.errors)} skipped.'
+                )
+                if not result.errors:
+                    return redirect('dashboard:product_list')
+    else:
+        form = CatalogImportForm()
+
+    context = {
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'dashboard/product_import.html', context)
+
 @login_required
 @admin_required
 def product_edit(request, product_id):
@@ -254,23 +296,53 @@ def product_edit(request, product_id):
 @login_required
 @admin_required
 def order_list(request):
-    """Paginated list of all orders, newest first."""
-    orders_qs = Order.objects.select_related('user').all().order_by('-created_at')
-    paginator = Paginator(orders_qs, 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    """Paginated list of all orders, newest first, optionally filtered by status."""
+    orders_qs = Order.objects.select_related('user').all()
+    status = request.GET.get('status')
+    if status in dict(Order.STATUS_CHOICES):
+        orders_qs = orders_qs.filter(status=status)
+    else:
+        status = ''
+    paginator = CursorPaginator(orders_qs, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'orders': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
+        'export_form': OrderExportForm(),
+        'status_choices': Order.STATUS_CHOICES,
+        'filter_status': status,
     }
     return render(request, 'dashboard/order_list.html', context)
 
+@login_required
+@admin_required
+def order_export(request):
+    """Stream orders and their items as CSV or NDJSON, filtered by date range and status."""
+    form = OrderExportForm(request.GET)
+    if not form.is_valid():
+        for error in form.errors.values():
+            messages.error(request, error[0])
+        return redirect('dashboard:order_list')
+
+    start, end = date_bounds(form.cleaned_data['start'], form.cleaned_data['end'])
+    rows = export_rows(start, end, form.cleaned_data['status'])
+    fmt = form.cleaned_data['format']
+    content_type, extension = EXPORT_FORMATS[fmt]
+
+    # Under ASGI a sync iterator would be read whole into memory before sending
+    lines = aiter_export(fmt, rows) if isinstance(request, ASGIRequest) else iter_export(fmt, rows)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    filename = f"orders-{timezone.localdate():%Y%m%d}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 @admin_required
 def order_detail(request, tracking_number):
     """View order details and items for a specific order."""
     order = get_object_or_404(Order, tracking_number=tracking_number)
-    order_items = order.items.all()
+    order_items = order.items.select_related('product__subcategory')
     
     context = {
         'order': order,
@@ -295,6 +367,55 @@ def update_order_status(request, tracking_number):
 
     return redirect('dashboard:order_detail', tracking_number=tracking_number)
 
+@login_required
+@admin_required
+@require_POST
+def bulk_update_order_status(request):
+    """Move the selected orders, or every order matching the list's filter, to a new status with set-based UPDATEs."""
+    status = request.POST.get('status')
+    # Back to the page, filter and cursor the admin submitted from
+    query = request.POST.get('query', '')
+    list_url = f"{reverse('dashboard:order_list')}?{query}" if query else reverse('dashboard:order_list')
+    if status not in dict(Order.STATUS_CHOICES):
+        messages.error(request, 'Invalid status')
+        return redirect(list_url)
+
+    if request.POST.get('select_all'):
+        selection = Order.objects.all()
+        filter_status = request.POST.get('filter_status')
+        if filter_status in dict(Order.STATUS_CHOICES):
+            selection = selection.filter(status=filter_status)
+    else:
+        order_ids = [pk for pk in request.POST.getlist('order_ids') if pk.isdigit()]
+        if not order_ids:
+            messages.warning(request, 'Select at least one order.')
+            return redirect(list_url)
+        selection = Order.objects.filter(pk__in=order_ids)
+
+    sources = [source for source, targets in Order.STATUS_TRANSITIONS.items() if status in targets]
+    movable = selection.filter(status__in=sources)
+    with transaction.atomic():
+        selected = dict(selection.order_by().values('status').annotate(count=Count('pk')).values_list('status', 'count'))
+        if status == 'cancelled':
+            # Before the UPDATE, while the newly cancelled orders can still be told apart
+            shift_items_sold(movable.values('pk'), -1)
+        # One UPDATE per source status, so the tallies move by exactly what each changed
+        moves = {status: 0}
+        now = timezone.now()
+        for source in sources:
+            moved_from = movable.filter(status=source).update(status=status, updated_at=now)
+            moves[source] = -moved_from
+            moves[status] += moved_from
+        record_status_changes(moves)
+
+    moved = moves[status]
+    label = dict(Order.STATUS_CHOICES)[status]
+    if moved:
+        messages.success(request, f'{moved} order(s) moved to "{label}".')
+    skipped = sum(selected.values()) - moved
+    if skipped:
+        messages.warning(request, f'{skipped} order(s) skipped: they cannot move to "{label}" from their current status.')
+    return redirect(list_url)
 
 
 # Carousel related views
@@ -302,13 +423,13 @@ def update_order_status(request, tracking_number):
 @admin_required
 def carousel_list(request):
     """Paginated list of carousel images."""
-    carousel_qs = CarouselImage.objects.all().order_by('order', '-created_at')
-    paginator = Paginator(carousel_qs, 20)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    carousel_qs = CarouselImage.objects.all()
+    paginator = CursorPaginator(carousel_qs, 20, ordering=('order', '-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'carousel_images': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
     return render(request, 'dashboard/carousel_list.html', context)
 
@@ -385,4 +506,33 @@ def carousel_delete(request, image_id):
     context = {
         'carousel_image': carousel_image
     }
-    return render(request, 'dashboard/carousel_delete.html', context)
\ No newline at end of file
+    return render(request, 'dashboard/carousel_delete.html', context)
+
+@login_required
+@admin_required
+def image_job_list(request):
+    """Queue of background image derivative jobs with per-status counts."""
+    jobs_qs = ImageJob.objects.all()
+    status = request.GET.get('status')
+    if status in dict(ImageJob.STATUS_CHOICES):
+        jobs_qs = jobs_qs.filter(status=status)
+    paginator = CursorPaginator(jobs_qs, 20)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    status_counts = dict(ImageJob.objects.values_list('status').annotate(count=Count('id')).order_by())
+    context = {
+        'jobs': page_obj,
+        'page_obj': page_obj,
+        'page_param': 'cursor',
+        'status_filter': status,
+        'status_counts': [(value, label, status_counts.get(value, 0)) for value, label in ImageJob.STATUS_CHOICES],
+    }
+    return render(request, 'dashboard/image_job_list.html', context)
+
+@login_required
+@admin_required
+@require_POST
+def image_job_retry(request):
+    """Send every failed image job back to the queue."""
+    count = retry_failed()
+    messages.success(request, f'{count} failed image job(s) queued again.')
+    return redirect('dashboard:image_job_list')
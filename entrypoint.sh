@@ -8,4 +8,5 @@ echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
 echo "Starting gunicorn..."
-exec gunicorn --config gunicorn.conf.py ameaozon.wsgi:application
+# The app (ASGI or WSGI) is chosen in gunicorn.conf.py from GUNICORN_INTERFACE
+exec gunicorn --config gunicorn.conf.py
@@ -1,10 +1,30 @@
 import multiprocessing
+import os
+import shutil
 
 # Bind to all interfaces — nginx container reverse-proxies to this
 bind = "0.0.0.0:8000"
 
-# CPX22: 4 vCPU — (2 * cores) + 1
-workers = multiprocessing.cpu_count() * 2 + 1
+# "asgi" (default) runs uvicorn workers: each process serves many requests
+# concurrently on one event loop while async views wait on the database.
+# "wsgi" is the classic sync worker, one request per process at a time.
+interface = os.environ.get("GUNICORN_INTERFACE", "asgi")
+
+if interface == "asgi":
+    wsgi_app = "ameaozon.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # Concurrency comes from the event loop, so one worker per core is enough
+    workers = multiprocessing.cpu_count() + 1
+    # ASGI runs ORM calls in per-request threads, so persistent connections
+    # cannot be reused between requests and would only leak. A per-worker
+    # pool hands connections from request to request instead of opening a
+    # new one each time (see DB_POOL in settings.py).
+    os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+    os.environ.setdefault("DB_POOL", "true")
+else:
+    wsgi_app = "ameaozon.wsgi:application"
+    # CPX22: 4 vCPU — (2 * cores) + 1
+    workers = multiprocessing.cpu_count() * 2 + 1
 
 # Restart workers after this many requests to prevent memory leaks
 max_requests = 1000
@@ -17,3 +37,25 @@ timeout = 30
 accesslog = "-"
 errorlog = "-"
 loglevel = "info"
+
+# Workers write metrics to files here so /metrics/ can merge every process;
+# must be set before any worker imports prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/ameaozon-metrics")
+
+
+def on_starting(server):
+    # Samples left by a previous run would be merged into this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_worker_init(worker):
+    # Start building the autocomplete index before the first keystroke asks for it
+    from store.autocomplete import get_prefix_index
+    get_prefix_index()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
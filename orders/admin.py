@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, Order, OrderItem, StockReservation
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
@@ -19,7 +19,12 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ['tracking_number', 'user__username', 'email', 'phone']
     inlines = [OrderItemInline]
 
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'user', 'quantity', 'expires_at']
+    search_fields = ['product__name', 'user__username']
+
 admin.site.register(Cart, CartAdmin)
 admin.site.register(CartItem)
 admin.site.register(Order, OrderAdmin)
-admin.site.register(OrderItem)
\ No newline at end of file
+admin.site.register(OrderItem)
+admin.site.register(StockReservation, StockReservationAdmin)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from orders.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = 'Delete checkout stock holds whose TTL has passed (run periodically, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        deleted, _ = StockReservation.objects.expired().delete()
+        self.stdout.write(self.style.SUCCESS(f'Released {deleted} expired reservations'))
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import DecimalField, F, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
 from store.models import Product
 import uuid
 
@@ -13,11 +16,24 @@ class Cart(models.Model):
     def __str__(self):
         return f"{self.user.username}'s cart"
     
+    @cached_property
+    def totals(self):
+        """Item count and price of the whole cart from one aggregate query (cached per instance)."""
+        totals = self.items.aggregate(
+            items=Sum('quantity'),
+            price=Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+        return {'items': totals['items'] or 0, 'price': totals['price'] or 0}
+
     def get_total_price(self):
-        return sum(item.get_cost() for item in self.items.all())
+        return self.totals['price']
     
     def get_total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals['items']
+
+    def get_items(self):
+        """Cart lines with their products (and subcategory) loaded in the same query."""
+        return self.items.select_related('product__subcategory')
 
 class CartItem(models.Model):
     """A product line-item within a cart with quantity."""
@@ -45,6 +61,15 @@ class Order(models.Model):
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled'),
     ]
+
+    # Statuses each status may move to through the dashboard bulk action
+    STATUS_TRANSITIONS = {
+        'pending': ['processing', 'cancelled'],
+        'processing': ['shipped', 'cancelled'],
+        'shipped': ['delivered'],
+        'delivered': [],
+        'cancelled': [],
+    }
     
     PAYMENT_CHOICES = [
         ('cash_on_delivery', 'Cash on Delivery'),
@@ -69,9 +94,21 @@ class Order(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='order_recent_idx'),
+        ]
     
     def __str__(self):
         return f"Order {self.tracking_number}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored values so saves can tell what actually changed
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
     
     def save(self, *args, **kwargs):
         if not self.tracking_number:
@@ -90,4 +127,32 @@ class OrderItem(models.Model):
         return f"{self.quantity} of {self.product.name}"
     
     def get_cost(self):
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class StockReservation(models.Model):
+    """Short-lived hold on product stock while a shopper is checking out."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = StockReservationQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('user', 'product')
+        indexes = [
+            models.Index(fields=['product', 'expires_at'], name='reservation_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} of {self.product.name} held for {self.user.username}"
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from store.models import Product
+from .models import StockReservation
+
+# How long stock stays held for a shopper who has entered checkout
+RESERVATION_TTL = timedelta(minutes=10)
+
+
+def held_by_others(user):
+    """Subquery: units of OuterRef('pk') product held by shoppers other than ``user``."""
+    holds = (
+        StockReservation.objects.active()
+        .filter(product=OuterRef('pk'))
+        .exclude(user=user)
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return Coalesce(Subquery(holds, output_field=IntegerField()), 0)
+
+
+def held_quantities(product_ids, user):
+    """``{product_id: units}`` currently held by other shoppers, in one query."""
+    return dict(
+        StockReservation.objects.active()
+        .filter(product_id__in=product_ids)
+        .exclude(user=user)
+        .order_by()
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('product_id', 'total')
+    )
+
+
+def available_stock(product, user):
+    """Stock ``user`` may still put in their cart once other shoppers' holds are taken out."""
+    return max(product.stock - held_quantities([product.pk], user).get(product.pk, 0), 0)
+
+
+def reserve(user, quantities):
+    """Replace ``user``'s holds with ``{product_id: qty}`` for another RESERVATION_TTL, if stock allows.
+
+    The products' rows stay locked from counting other shoppers' holds to
+    writing these, so two shoppers cannot both hold the last unit. Returns
+    ``{product_id: units available}`` for every product that falls short; then
+    nothing is held and ``user``'s earlier holds are released.
+    """
+    expires_at = timezone.now() + RESERVATION_TTL
+    with transaction.atomic():
+        # Locked in pk order, so overlapping checkouts cannot deadlock
+        stock = dict(
+            Product.objects.select_for_update().filter(pk__in=list(quantities)).order_by('pk').values_list('pk', 'stock')
+        )
+        held = held_quantities(quantities, user)
+        shortfalls = {}
+        for product_id, qty in quantities.items():
+            available = max(stock.get(product_id, 0) - held.get(product_id, 0), 0)
+            if qty > available:
+                shortfalls[product_id] = available
+        if shortfalls:
+            release(user)
+            return shortfalls
+
+        StockReservation.objects.filter(user=user).exclude(product_id__in=list(quantities)).delete()
+        # An upsert, so overlapping checkouts by the same user both succeed
+        # instead of one tripping the (user, product) unique constraint
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(user=user, product_id=product_id, quantity=qty, expires_at=expires_at)
+                for product_id, qty in quantities.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'product'],
+            update_fields=['quantity', 'expires_at'],
+        )
+    return {}
+
+
+def release(user):
+    StockReservation.objects.filter(user=user).delete()
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent inside the checkout transaction once an order and its items exist.
+# Arguments: order, items (the OrderItem instances, which were bulk-created
+# and so never sent post_save).
+order_placed = Signal()
@@ -1,3 +1,142 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from store.models import Category, SubCategory, Product
+from .models import Cart, CartItem, Order, OrderItem, StockReservation
+from .reservations import available_stock, release, reserve
+from .views import _StockShortfall, _decrement_stock
+
+CHECKOUT_FORM = {
+    'first_name': 'Test', 'last_name': 'Shopper', 'email': 'shopper@example.com', 'phone': '01712345678',
+    'address': 'House 1', 'city': 'Dhaka', 'postal_code': '1207', 'payment_method': 'card',
+}
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    # The manifest only exists after collectstatic
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class CheckoutTestCase(TestCase):
+    """Two shoppers with the single unit of one product in their carts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Cats', slug='cats')
+        cls.subcategory = SubCategory.objects.create(category=category, name='Cat Food', slug='cat-food')
+        cls.product = cls.make_product('Tuna Treat', stock=1)
+        cls.alice = cls.make_shopper('alice')
+        cls.bob = cls.make_shopper('bob')
+
+    @classmethod
+    def make_product(cls, name, stock):
+        return Product.objects.create(
+            subcategory=cls.subcategory, name=name, slug=name.lower().replace(' ', '-'),
+            description='Treats.', price=Decimal('4.50'), stock=stock,
+        )
+
+    @classmethod
+    def make_shopper(cls, username):
+        user = User.objects.create_user(username, f'{username}@example.com', 'pw')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=cls.product, quantity=1)
+        return user
+
+    def checkout(self, user, data=None):
+        self.client.force_login(user)
+        if data is None:
+            return self.client.get(reverse('orders:checkout'), secure=True)
+        return self.client.post(reverse('orders:checkout'), data, secure=True)
+
+
+class ReservationTests(CheckoutTestCase):
+    """Checkout holds never promise more stock than there is."""
+
+    def test_second_hold_on_last_unit_is_refused(self):
+        self.assertEqual(reserve(self.alice, {self.product.pk: 1}), {})
+        self.assertEqual(reserve(self.bob, {self.product.pk: 1}), {self.product.pk: 0})
+        self.assertFalse(StockReservation.objects.filter(user=self.bob).exists())
+        self.assertEqual(available_stock(self.product, self.bob), 0)
+
+    def test_renewing_own_hold_is_not_counted_against_it(self):
+        reserve(self.alice, {self.product.pk: 1})
+        self.assertEqual(reserve(self.alice, {self.product.pk: 1}), {})
+        self.assertEqual(StockReservation.objects.get(user=self.alice).quantity, 1)
+
+    def test_refused_hold_releases_earlier_holds(self):
+        other = self.make_product('Salmon Bites', stock=5)
+        reserve(self.bob, {other.pk: 2})
+        reserve(self.alice, {self.product.pk: 1})
+        self.assertEqual(reserve(self.bob, {other.pk: 2, self.product.pk: 1}), {self.product.pk: 0})
+        self.assertFalse(StockReservation.objects.filter(user=self.bob).exists())
+
+    def test_expired_hold_frees_its_stock(self):
+        reserve(self.alice, {self.product.pk: 1})
+        StockReservation.objects.filter(user=self.alice).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(reserve(self.bob, {self.product.pk: 1}), {})
+
+    def test_released_hold_frees_its_stock(self):
+        reserve(self.alice, {self.product.pk: 1})
+        release(self.alice)
+        self.assertEqual(reserve(self.bob, {self.product.pk: 1}), {})
+
+    def test_checkout_is_refused_while_another_shopper_holds_the_stock(self):
+        self.assertEqual(self.checkout(self.alice).status_code, 200)
+        response = self.checkout(self.bob)
+        self.assertRedirects(response, reverse('orders:cart_detail'), fetch_redirect_response=False)
+        self.assertFalse(StockReservation.objects.filter(user=self.bob).exists())
+
+        # The shopper holding the unit can still buy it
+        response = self.checkout(self.alice, CHECKOUT_FORM)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith('/payment/'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class StockDecrementTests(CheckoutTestCase):
+    """Placing orders never sells stock that is not there."""
+
+    def test_shortfall_on_one_line_rolls_back_the_whole_order(self):
+        other = self.make_product('Salmon Bites', stock=5)
+        CartItem.objects.create(cart=self.alice.cart, product=other, quantity=2)
+        Product.objects.filter(pk=self.product.pk).update(stock=0)
+
+        response = self.checkout(self.alice, CHECKOUT_FORM)
+        self.assertRedirects(response, reverse('orders:cart_detail'), fetch_redirect_response=False)
+        other.refresh_from_db()
+        self.assertEqual(other.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(self.alice.cart.items.count(), 2)
+
+    def test_second_checkout_for_last_unit_is_refused(self):
+        self.assertEqual(self.checkout(self.alice, CHECKOUT_FORM).status_code, 302)
+        response = self.checkout(self.bob, CHECKOUT_FORM)
+        self.assertRedirects(response, reverse('orders:cart_detail'), fetch_redirect_response=False)
+        self.assertEqual(list(Order.objects.values_list('user__username', flat=True)), ['alice'])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    def test_stock_never_goes_negative(self):
+        with self.assertRaises(_StockShortfall):
+            _decrement_stock({self.product.pk: 2}, self.alice)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+        # Another shopper's hold on the only unit counts against it as well
+        reserve(self.bob, {self.product.pk: 1})
+        with self.assertRaises(_StockShortfall):
+            _decrement_stock({self.product.pk: 1}, self.alice)
+        _decrement_stock({self.product.pk: 1}, self.bob)
+        with self.assertRaises(_StockShortfall):
+            _decrement_stock({self.product.pk: 1}, self.alice)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
@@ -2,12 +2,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Case, F, Q, When
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from .models import Cart, CartItem, Order, OrderItem
 from .forms import OrderForm
+from .signals import order_placed
+from .reservations import available_stock, held_by_others, release, reserve
+from ameaozon.metrics import CHECKOUTS
 from store.models import Product
+from store.shopper import get_shopper_state
 from payment.models import Payment
 
 @login_required
@@ -15,7 +19,7 @@ def cart_detail(request):
     """Display the user's shopping cart contents."""
     try:
         cart = Cart.objects.get(user=request.user)
-        cart_items = cart.items.all()
+        cart_items = cart.get_items()
     except Cart.DoesNotExist:
         cart = None
         cart_items = []
@@ -33,8 +37,9 @@ def cart_add(request, product_id):
     product = get_object_or_404(Product, id=product_id)
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
-    # Check if product is available and in stock
-    if not product.is_available or product.stock <= 0:
+    # Check if product is available and in stock, net of other shoppers' checkout holds
+    available = available_stock(product, request.user) if product.is_available else 0
+    if available <= 0:
         if is_ajax:
             return JsonResponse({'error': 'Not available', 'cart_count': _get_cart_count(request)})
         if request.headers.get('HX-Request'):
@@ -56,8 +61,8 @@ def cart_add(request, product_id):
     # Check if quantity is valid
     if quantity <= 0:
         quantity = 1
-    if quantity > product.stock:
-        quantity = product.stock
+    if quantity > available:
+        quantity = available
 
     # Check if product already in cart
     try:
@@ -78,17 +83,13 @@ def cart_add(request, product_id):
     return redirect('orders:cart_detail')
 
 def _get_cart_count(request):
-    try:
-        cart = Cart.objects.get(user=request.user)
-        return cart.get_total_items()
-    except Cart.DoesNotExist:
-        return 0
+    return get_shopper_state(request).cart_count
 
 
 def _render_cart_partial(request):
     try:
         cart = Cart.objects.get(user=request.user)
-        cart_items = cart.items.all()
+        cart_items = cart.get_items()
     except Cart.DoesNotExist:
         cart = None
         cart_items = []
@@ -142,10 +143,11 @@ def cart_update(request, product_id):
             if not request.headers.get('HX-Request') and not is_ajax:
                 messages.success(request, f"'{product.name}' removed from your cart.")
         else:
-            if quantity > product.stock:
-                quantity = product.stock
+            available = available_stock(product, request.user)
+            if quantity > available:
+                quantity = available
                 if not request.headers.get('HX-Request') and not is_ajax:
-                    messages.warning(request, f"Only {product.stock} of '{product.name}' available.")
+                    messages.warning(request, f"Only {available} of '{product.name}' available.")
 
             cart_item.quantity = quantity
             cart_item.save()
@@ -162,57 +164,81 @@ def cart_update(request, product_id):
         return _render_cart_partial(request)
     return redirect('orders:cart_detail')
 
+class _StockShortfall(Exception):
+    """Raised inside the checkout transaction to roll it back when stock ran out."""
+
+
+def _decrement_stock(quantities, user):
+    """Take ``{product_id: qty}`` out of stock in one guarded UPDATE.
+
+    Each row is only touched if ``stock >= qty`` plus whatever other shoppers
+    hold still holds at write time, so concurrent checkouts cannot oversell.
+    Raises _StockShortfall if any product fell short; the caller's
+    transaction then rolls back every row.
+    """
+    held = held_by_others(user)
+    guard = Q()
+    for product_id, qty in quantities.items():
+        guard |= Q(pk=product_id, stock__gte=held + qty)
+    updated = Product.objects.filter(guard).update(stock=Case(
+        *[When(pk=product_id, then=F('stock') - qty) for product_id, qty in quantities.items()],
+        default=F('stock'),
+        output_field=Product._meta.get_field('stock'),
+    ))
+    if updated != len(quantities):
+        raise _StockShortfall
+
+
 @login_required
 def checkout(request):
     """Validate cart, collect shipping info, create order, and redirect to payment."""
     try:
         cart = Cart.objects.get(user=request.user)
-        cart_items = cart.items.all()
+        cart_items = list(cart.items.select_related('product'))
         
         if not cart_items:
+            CHECKOUTS.labels('empty_cart').inc()
             messages.warning(request, "Your cart is empty. Please add some products before checkout.")
             return redirect('orders:cart_detail')
         
-        # Check stock availability
-        for item in cart_items:
-            if item.quantity > item.product.stock:
-                messages.error(request, f"Only {item.product.stock} of '{item.product.name}' available. Please update your cart.")
-                return redirect('orders:cart_detail')
-        
-        # Calculate total
-        total_price = cart.get_total_price()
+        quantities = {item.product_id: item.quantity for item in cart_items}
+
+        # Calculate total from the prices loaded above; the same snapshot is frozen on the order items
+        total_price = sum(item.get_cost() for item in cart_items)
         
         if request.method == 'POST':
             form = OrderForm(request.POST)
 
             if form.is_valid():
-                with transaction.atomic():
-
-                    order = form.save(commit=False)
-                    order.user = request.user
-                    order.total_price = total_price
-                    order.save()
-
-                    # Create order items
-                    for item in cart_items:
-                        OrderItem.objects.create(
-                            order=order,
-                            product=item.product,
-                            price=item.product.price,
-                            quantity=item.quantity
-                        )
-
-                        # Update product stock
-                        Product.objects.filter(pk=item.product.pk).update(
-                            stock=F('stock') - item.quantity
-                        )
-
-                    # Clear cart
-                    cart.items.all().delete()
-
+                # The guarded UPDATE in _decrement_stock() is the availability check
+                try:
+                    with transaction.atomic():
+                        _decrement_stock(quantities, request.user)
+
+                        order = form.save(commit=False)
+                        order.user = request.user
+                        order.total_price = total_price
+                        order.save()
+
+                        order_items = OrderItem.objects.bulk_create([
+                            OrderItem(order=order, product=item.product, price=item.product.price, quantity=item.quantity)
+                            for item in cart_items
+                        ])
+                        order_placed.send(sender=Order, order=order, items=order_items)
+
+                        # Clear cart and the holds it no longer needs
+                        cart.items.all().delete()
+                        release(request.user)
+                except _StockShortfall:
+                    CHECKOUTS.labels('sold_out').inc()
+                    messages.error(request, "Some items in your cart just sold out. Please review your cart.")
+                    return redirect('orders:cart_detail')
+
+                CHECKOUTS.labels('placed').inc()
                 # Redirect to payment page
                 return redirect('payment:payment_process', tracking_number=order.tracking_number)
             else:
+                CHECKOUTS.labels('invalid').inc()
                 messages.error(request, 'Please fix the errors in your shipping details before placing the order.')
         else:
             # Pre-fill form with user data
@@ -229,7 +255,18 @@ def checkout(request):
                 initial_data['address'] = request.user.address
             
             form = OrderForm(initial=initial_data)
-        
+
+        # Hold the cart's stock while the shopper fills in the form; stock other
+        # shoppers already hold cannot be held again, so send them back to the cart
+        shortfalls = reserve(request.user, quantities)
+        if shortfalls:
+            CHECKOUTS.labels('out_of_stock').inc()
+            for item in cart_items:
+                if item.product_id in shortfalls:
+                    messages.error(request, f"Only {shortfalls[item.product_id]} of '{item.product.name}' available. Please update your cart.")
+            return redirect('orders:cart_detail')
+
+
         context = {
             'cart': cart,
             'cart_items': cart_items,
@@ -239,6 +276,7 @@ def checkout(request):
         return render(request, 'orders/checkout.html', context)
     
     except Cart.DoesNotExist:
+        CHECKOUTS.labels('empty_cart').inc()
         messages.warning(request, "Your cart is empty. Please add some products before checkout.")
         return redirect('store:home')
 
@@ -255,7 +293,7 @@ def order_complete(request, tracking_number):
     context = {
         'order': order,
         'payment': payment,
-        'order_items': order.items.all()
+        'order_items': order.items.select_related('product')
     }
     return render(request, 'orders/order_complete.html', context)
 
@@ -280,6 +318,6 @@ def track_order_detail(request, tracking_number):
 
     context = {
         'order': order,
-        'order_items': order.items.all()
+        'order_items': order.items.select_related('product')
     }
     return render(request, 'orders/track_order_detail.html', context)
\ No newline at end of file
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from orders.models import Order
+from ameaozon.metrics import PAYMENTS
 from .models import Payment
 import secrets
 
@@ -29,6 +30,7 @@ def payment_process(request, tracking_number):
         # Update order but don't mark as paid yet
         order.status = 'processing'
         order.save()
+        PAYMENTS.labels(order.payment_method, 'pending').inc()
         
         return redirect('payment:payment_complete', tracking_number=order.tracking_number)
     
@@ -67,9 +69,11 @@ def payment_complete(request, tracking_number):
             order.status = 'processing'
             order.save()
             
+            PAYMENTS.labels(order.payment_method, 'completed').inc()
             messages.success(request, "Payment completed successfully!")
             return redirect('orders:order_complete', tracking_number=order.tracking_number)
         else:
+            PAYMENTS.labels(order.payment_method, 'failed').inc()
             messages.error(request, "Payment failed. Please try again.")
             return redirect('payment:payment_process', tracking_number=order.tracking_number)
     
@@ -90,6 +94,7 @@ def payment_canceled(request, tracking_number):
     """Handle payment cancellation."""
     order = get_object_or_404(Order, tracking_number=tracking_number, user=request.user)
     
+    PAYMENTS.labels(order.payment_method, 'canceled').inc()
     messages.warning(request, "Your payment was canceled.")
     
     context = {
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, SubCategory, Product, ProductImage, CarouselImage, Review, Wishlist
+from .models import Category, SubCategory, Product, ProductImage, CarouselImage, Review, Wishlist, ImageJob
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -39,4 +39,10 @@ class WishlistAdmin(admin.ModelAdmin):
     search_fields = ['user__username']
 
 admin.site.register(Review, ReviewAdmin)
-admin.site.register(Wishlist, WishlistAdmin)
\ No newline at end of file
+admin.site.register(Wishlist, WishlistAdmin)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = ['source', 'model_label', 'object_id', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'model_label']
+    search_fields = ['source']
+
+admin.site.register(ImageJob, ImageJobAdmin)
@@ -0,0 +1,140 @@
+import bisect
+import logging
+import re
+import threading
+import time
+
+from django.db import connection
+from django.urls import reverse
+
+from .caching import get_catalog_version
+from .models import Product, SubCategory
+
+# Only the first few words of a name are indexed as prefix entry points.
+MAX_WORD_STARTS = 6
+MAX_SCAN = 500
+# Seconds between catalog version checks; keystrokes in between trust the last one
+VERSION_CHECK_INTERVAL = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text):
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    """Sorted array of lowercase name suffixes, searched with bisect.
+
+    Every name is indexed from its start and from the start of each of its
+    first few words, so "treat" finds "Tuna Treats" as well as "Treat Jar".
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        pairs = []
+        for i, (name, kind, args) in enumerate(entries):
+            text = _normalize(name)
+            starts = [0] + [m.start() for m in re.finditer(r' (?=\S)', text)][:MAX_WORD_STARTS - 1]
+            for pos in starts:
+                key = text[pos:].lstrip()
+                pairs.append((key, pos, i))
+        pairs.sort()
+        self.keys = [key for key, _, _ in pairs]
+        self.refs = [(pos, i) for _, pos, i in pairs]
+
+    def lookup(self, prefix, limit=8):
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        best = {}
+        start = bisect.bisect_left(self.keys, prefix)
+        for j in range(start, min(start + MAX_SCAN, len(self.keys))):
+            if not self.keys[j].startswith(prefix):
+                break
+            pos, i = self.refs[j]
+            if i not in best or pos < best[i]:
+                best[i] = pos
+        # Whole-name matches first, then shorter names
+        ranked = sorted(best, key=lambda i: (best[i] > 0, len(self.entries[i][0]), self.entries[i][0]))
+        return [self.entries[i] for i in ranked[:limit]]
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+_building = False
+_checked_at = 0.0
+
+
+def _build_index():
+    entries = [
+        (name, 'product', (slug,))
+        for name, slug in Product.objects.filter(is_available=True).values_list('name', 'slug')
+    ]
+    entries += [
+        (name, 'subcategory', (category_slug, slug))
+        for name, slug, category_slug in SubCategory.objects.filter(
+            is_active=True, category__is_active=True
+        ).values_list('name', 'slug', 'category__slug')
+    ]
+    return PrefixIndex(entries)
+
+
+def rebuild_prefix_index(version):
+    """Build the index for catalog ``version`` in this thread and start serving it."""
+    global _index, _index_version
+    index = _build_index()
+    with _lock:
+        _index, _index_version = index, version
+
+
+def _rebuild_in_background(version):
+    global _building
+    try:
+        rebuild_prefix_index(version)
+    except Exception:
+        logger.exception('Rebuilding the autocomplete index failed')
+    finally:
+        # Connections are per thread, and this thread is about to end
+        connection.close()
+        with _lock:
+            _building = False
+
+
+def _start_rebuild(version):
+    global _building
+    with _lock:
+        if _building:
+            return
+        _building = True
+    threading.Thread(target=_rebuild_in_background, args=(version,), name='autocomplete-index', daemon=True).start()
+
+
+def get_prefix_index():
+    """This process's PrefixIndex, or None until its first build has finished.
+
+    When the catalog version moves, a background thread builds the new index
+    while requests keep using the old one, so no request waits on a rebuild.
+    """
+    global _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return _index
+    _checked_at = now
+    version = get_catalog_version()
+    if version != _index_version:
+        _start_rebuild(version)
+    return _index
+
+
+def suggest(prefix, limit=8):
+    """Top ``limit`` product and subcategory names starting with ``prefix``."""
+    index = get_prefix_index()
+    if index is None:
+        return []
+    url_names = {'product': 'store:product_detail', 'subcategory': 'store:subcategory_detail'}
+    return [
+        {'name': name, 'type': kind, 'url': reverse(url_names[kind], args=args)}
+        for name, kind, args in index.lookup(prefix, limit)
+    ]
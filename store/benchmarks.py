@@ -0,0 +1,239 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from ameaozon.middleware import install_query_recording, record_queries
+from orders.models import Order
+from .models import Product
+
+# Latency figures compared against a baseline; p99 is too noisy for short runs
+LATENCY_KEYS = ('p50_ms', 'p95_ms')
+
+
+class JourneyError(Exception):
+    """The journeys cannot run, or a step answered with a status its journey does not expect."""
+
+
+class Catalog:
+    """What the journeys pick from, loaded once from the seeded database."""
+
+    def __init__(self, sample=1000):
+        self.products = list(
+            Product.objects.filter(
+                is_available=True, stock__gte=50,
+                subcategory__is_active=True, subcategory__category__is_active=True,
+            ).order_by('pk').values_list('pk', 'slug', 'subcategory__category__slug')[:sample]
+        )
+        self.customer_ids = list(
+            User.objects.filter(user_type=User.CUSTOMER, is_active=True).order_by('pk').values_list('pk', flat=True)[:sample]
+        )
+        self.admin = User.objects.filter(user_type=User.ADMIN, is_active=True).order_by('pk').first()
+        self.tracking_numbers = list(
+            Order.objects.order_by('-created_at', '-id').values_list('tracking_number', flat=True)[:sample]
+        )
+
+    def missing(self):
+        """Why the journeys cannot run against this database, if they cannot."""
+        if not self.products:
+            return 'no available products with stock; seed the database with generate_synthetic_data'
+        if not self.customer_ids:
+            return 'no customer accounts; seed the database with generate_synthetic_data'
+        if self.admin is None:
+            return 'no admin account; create one with create_demo_users'
+        return None
+
+
+class Session:
+    """One simulated visitor: a logged-in test client that times and counts each step."""
+
+    def __init__(self, recorder, journey, user):
+        self.recorder = recorder
+        self.journey = journey
+        self.client = Client()
+        self.client.force_login(user)
+
+    def step(self, name, method, path, data=None, expect=(200,), headers=None):
+        with record_queries() as queries:
+            started = time.perf_counter()
+            # secure=True keeps SECURE_SSL_REDIRECT from turning every step into a redirect
+            response = getattr(self.client, method)(path, data, secure=True, headers=headers)
+            elapsed = time.perf_counter() - started
+        self.recorder.add(f'{self.journey}.{name}', elapsed, queries.count, response.status_code in expect)
+        if response.status_code not in expect:
+            raise JourneyError(f'{self.journey}.{name}: {method.upper()} {path} answered {response.status_code}')
+        return response
+
+
+def shopper_journey(session, catalog, rng):
+    """Browse home, category and product, add to cart, check out and pay by card."""
+    product_id, slug, category_slug = rng.choice(catalog.products)
+    session.step('home', 'get', reverse('store:home'))
+    session.step('category', 'get', reverse('store:category_detail', args=[category_slug]))
+    session.step('product', 'get', reverse('store:product_detail', args=[slug]))
+    session.step('add_to_cart', 'post', reverse('orders:cart_add', args=[product_id]), {'quantity': 1}, headers={'HX-Request': 'true'})
+    session.step('checkout', 'get', reverse('orders:checkout'))
+    response = session.step('place_order', 'post', reverse('orders:checkout'), {
+        'first_name': 'Bench', 'last_name': 'Shopper', 'email': 'bench@example.com', 'phone': '01712345678',
+        'address': 'House 1, Road 1', 'city': 'Dhaka', 'postal_code': '1207', 'payment_method': 'card',
+    }, expect=(302,))
+    tracking_number = response['Location'].rstrip('/').rsplit('/', 1)[-1]
+    session.step('payment', 'get', reverse('payment:payment_process', args=[tracking_number]))
+    session.step('pay', 'post', reverse('payment:payment_complete', args=[tracking_number]), expect=(302,))
+
+
+def admin_journey(session, catalog, rng):
+    """Open the dashboard, the order list and one order."""
+    session.step('dashboard', 'get', reverse('dashboard:admin_dashboard'))
+    session.step('order_list', 'get', reverse('dashboard:order_list'))
+    if catalog.tracking_numbers:
+        session.step('order_detail', 'get', reverse('dashboard:order_detail', args=[rng.choice(catalog.tracking_numbers)]))
+
+
+JOURNEYS = {'shopper': shopper_journey, 'admin': admin_journey}
+
+
+class Recorder:
+    """Thread-safe latency, query count and error samples per step."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, step, elapsed, queries, ok):
+        with self.lock:
+            if ok:
+                self.samples[step].append((elapsed, queries))
+            else:
+                self.errors[step] += 1
+
+
+def _percentile(sorted_values, percent):
+    # Nearest-rank percentile, so small runs still report a measured value
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder, wall_time):
+    steps = {}
+    for step in sorted(set(recorder.samples) | set(recorder.errors)):
+        samples = recorder.samples.get(step, [])
+        latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+        queries = [count for _, count in samples]
+        steps[step] = {
+            'count': len(samples),
+            'errors': recorder.errors.get(step, 0),
+            'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+            'mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+            'p50_ms': round(_percentile(latencies, 50), 2) if latencies else None,
+            'p95_ms': round(_percentile(latencies, 95), 2) if latencies else None,
+            'p99_ms': round(_percentile(latencies, 99), 2) if latencies else None,
+            'queries_mean': round(statistics.fmean(queries), 2) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+    return steps
+
+
+def run_benchmark(shoppers=20, admins=5, concurrency=1, seed=42, warmup=2):
+    """Run the journeys and return the results document saved as JSON.
+
+    Journeys run in ``concurrency`` threads, each with its own test client
+    and database connection; ``warmup`` journeys of each kind run first so
+    cold caches are not measured. Shopper journeys place real orders, so
+    point this at a disposable, seeded database.
+    """
+    install_query_recording()
+    catalog = Catalog()
+    problem = catalog.missing()
+    if problem:
+        raise JourneyError(problem)
+
+    plan = ['shopper'] * shoppers + ['admin'] * admins
+    random.Random(seed).shuffle(plan)
+    failures = []
+
+    def run(recorder, index, kind):
+        rng = random.Random(f'{seed}:{kind}:{index}')
+        user = catalog.admin if kind == 'admin' else User.objects.get(pk=rng.choice(catalog.customer_ids))
+        session = Session(recorder, kind, user)
+        try:
+            JOURNEYS[kind](session, catalog, rng)
+        except JourneyError as error:
+            with recorder.lock:
+                failures.append(str(error))
+        finally:
+            connections.close_all()
+
+    # The test client talks to the app as "testserver"
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        warm = Recorder()
+        for index, kind in enumerate(['shopper', 'admin'] * warmup):
+            run(warm, -1 - index, kind)
+        failures.clear()
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda item: run(recorder, *item), enumerate(plan)))
+        wall_time = time.perf_counter() - started
+
+    steps = summarize(recorder, wall_time)
+    total = sum(step['count'] for step in steps.values())
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'database': connection.vendor,
+            'seed': seed,
+            'shoppers': shoppers,
+            'admins': admins,
+            'concurrency': concurrency,
+            'wall_time_s': round(wall_time, 3),
+            'throughput_rps': round(total / wall_time, 2) if wall_time else 0.0,
+        },
+        'steps': steps,
+        'failures': failures[:20],
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Regressions of ``results`` against ``baseline``, as human-readable lines.
+
+    Latency percentiles may grow and throughput may drop by ``tolerance``
+    (a fraction) before counting as a regression; query counts may not grow
+    at all, and any failed step is a regression.
+    """
+    regressions = [f'{step}: {data["errors"]} failed requests' for step, data in results['steps'].items() if data['errors']]
+    for step, old in baseline.get('steps', {}).items():
+        new = results['steps'].get(step)
+        if new is None or not new['count'] or not old.get('count'):
+            continue
+        for key in LATENCY_KEYS:
+            if old.get(key) and new[key] > old[key] * (1 + tolerance):
+                regressions.append(f'{step}: {key} {new[key]} ms vs baseline {old[key]} ms')
+        if old.get('queries_max') is not None and new['queries_max'] > old['queries_max']:
+            regressions.append(f'{step}: up to {new["queries_max"]} queries vs baseline {old["queries_max"]}')
+    old_rps, new_rps = baseline.get('meta', {}).get('throughput_rps'), results['meta']['throughput_rps']
+    if old_rps and new_rps < old_rps * (1 - tolerance):
+        regressions.append(f'throughput {new_rps} req/s vs baseline {old_rps} req/s')
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(results, stream, indent=2)
+        stream.write('\n')
@@ -0,0 +1,73 @@
+import time
+
+from ameaozon.metrics import record_cache_lookup
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# Homepage fragments show stock, which checkout changes without a version bump,
+# so they are also refreshed on a short timer.
+HOME_FRAGMENT_TIMEOUT = 60 * 5
+
+
+def get_catalog_version():
+    """Current catalog generation; every catalog cache key is namespaced by it."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        _start_new_generation()
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def _start_new_generation():
+    # Seeded from the clock so a lost version key never resurrects stale entries.
+    cache.add(CATALOG_VERSION_KEY, time.time_ns() // 1000, None)
+
+
+def catalog_key(name):
+    return f'catalog:{get_catalog_version()}:{name}'
+
+
+def bump_catalog_version():
+    """Invalidate every catalog entry at once by moving to a new key namespace."""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        _start_new_generation()
+        return cache.get(CATALOG_VERSION_KEY)
+
+
+def get_or_set_catalog(name, default):
+    """Read a catalog entry from the shared cache, computing it with default() on a miss."""
+    key = catalog_key(name)
+    value = cache.get(key)
+    record_cache_lookup(name, hit=value is not None)
+    if value is None:
+        value = default()
+        cache.add(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+# Async counterparts for views served under ASGI
+
+async def aget_catalog_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, time.time_ns() // 1000, None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+async def acatalog_key(name):
+    return f'catalog:{await aget_catalog_version()}:{name}'
+
+
+async def aget_or_set_catalog(name, default):
+    """get_or_set_catalog() where ``default`` is a coroutine function, e.g. an async ORM query."""
+    key = await acatalog_key(name)
+    value = await cache.aget(key)
+    record_cache_lookup(name, hit=value is not None)
+    if value is None:
+        value = await default()
+        await cache.aadd(key, value, CATALOG_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .caching import bump_catalog_version
+from .image_jobs import enqueue_new
+from .models import Product, SubCategory
+from .search import index_products
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'jsonl')
+UPDATE_FIELDS = ['subcategory', 'name', 'description', 'price', 'stock', 'is_available', 'updated_at']
+
+_TRUE = {'1', 'true', 'yes', 'y', 'on'}
+_FALSE = {'0', 'false', 'no', 'n', 'off', ''}
+
+
+class ImportResult:
+    """Running totals for one catalog import."""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+def guess_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_records(stream, fmt):
+    """Yield ``(line_number, dict)`` pairs from a text stream of CSV or JSON Lines."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def open_upload(uploaded_file):
+    """Text stream over an uploaded file, tolerating a UTF-8 BOM from spreadsheet exports."""
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+
+class SlugAllocator:
+    """Hands out unique product slugs from an in-memory set loaded with one query."""
+
+    def __init__(self, taken):
+        self.taken = set(taken)
+
+    def allocate(self, name):
+        base = slugify(name)[:45] or 'product'
+        slug, suffix = base, 2
+        while slug in self.taken:
+            slug = f'{base}-{suffix}'
+            suffix += 1
+        self.taken.add(slug)
+        return slug
+
+
+def _subcategory_lookup():
+    """Map both subcategory slugs and 'category/subcategory' name paths to ids."""
+    lookup = {}
+    for pk, slug, name, category in SubCategory.objects.values_list('pk', 'slug', 'name', 'category__name'):
+        lookup[slug] = pk
+        lookup[f'{category}/{name}'.lower()] = pk
+    return lookup
+
+
+def _clean(record, subcategories):
+    """Validate one raw record into Product field values, raising ValueError with a readable reason."""
+    if not isinstance(record, dict):
+        raise ValueError('not a valid JSON object')
+    name = str(record.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+
+    subcategory = str(record.get('subcategory') or '').strip()
+    subcategory_id = subcategories.get(subcategory) or subcategories.get(subcategory.lower())
+    if subcategory_id is None:
+        raise ValueError(f'unknown subcategory "{subcategory}"')
+
+    try:
+        price = Decimal(str(record.get('price')))
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite():
+        raise ValueError(f'invalid price "{record.get("price")}"')
+    price = price.quantize(Decimal('0.01'))
+    if price < 0:
+        raise ValueError('price must not be negative')
+
+    try:
+        stock = int(record.get('stock') or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid stock "{record.get("stock")}"')
+    if stock < 0:
+        raise ValueError('stock must not be negative')
+
+    available = record.get('is_available', True)
+    if not isinstance(available, bool):
+        flag = str(available).strip().lower()
+        if flag not in _TRUE | _FALSE:
+            raise ValueError(f'invalid is_available "{available}"')
+        available = flag in _TRUE
+
+    return {
+        'slug': str(record.get('slug') or '').strip(),
+        'subcategory_id': subcategory_id,
+        'name': name[:200],
+        'description': str(record.get('description') or ''),
+        'price': price,
+        'stock': stock,
+        'is_available': available,
+        'image': str(record.get('image') or '').strip(),
+    }
+
+
+def import_catalog(records, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Create or update products from ``(line_number, record)`` pairs in batches.
+
+    A record whose ``slug`` matches an existing product updates it; every
+    other record becomes a new product with a freshly allocated unique slug;
+    ``image`` (a path in media storage) is only applied to new products.
+    ``subcategory`` is a subcategory slug or a ``Category/Subcategory`` path.
+    Subcategories and existing slugs are loaded once up front, so each batch
+    costs one INSERT, one UPDATE, one INSERT of image jobs for new products
+    with images and a search index refresh regardless of its size. Invalid
+    rows are skipped and reported in the result. ``progress`` is called with
+    the running ImportResult after every batch.
+    """
+    result = ImportResult()
+    subcategories = _subcategory_lookup()
+    existing = dict(Product.objects.values_list('slug', 'pk'))
+    slugs = SlugAllocator(existing)
+    records = iter(records)
+
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+
+        now = timezone.now()
+        to_create, to_update, new_by_slug = [], {}, {}
+        for line, record in batch:
+            result.processed += 1
+            try:
+                values = _clean(record, subcategories)
+            except ValueError as error:
+                result.add_error(line, str(error))
+                continue
+            slug, image = values.pop('slug'), values.pop('image')
+            # Later rows for the same slug win
+            if slug in existing:
+                to_update[slug] = Product(pk=existing[slug], slug=slug, updated_at=now, **values)
+            elif slug in new_by_slug:
+                for field, value in values.items():
+                    setattr(new_by_slug[slug], field, value)
+            else:
+                product = Product(slug=slugs.allocate(slug or values['name']), image=image, **values)
+                to_create.append(product)
+                if slug:
+                    new_by_slug[slug] = product
+
+        with transaction.atomic():
+            created = Product.objects.bulk_create(to_create)
+            enqueue_new(created)
+            Product.objects.bulk_update(list(to_update.values()), UPDATE_FIELDS)
+            touched = [product.pk for product in created] + [product.pk for product in to_update.values()]
+            if touched:
+                index_products(Product.objects.filter(pk__in=touched))
+        for product in created:
+            existing[product.slug] = product.pk
+
+        result.created += len(created)
+        result.updated += len(to_update)
+        if progress:
+            progress(result)
+
+    if result.created or result.updated:
+        bump_catalog_version()
+    return result
@@ -1,38 +1,35 @@
-from django.core.cache import cache
-from .models import Category, Wishlist
-from orders.models import Cart
+from django.utils.functional import SimpleLazyObject
+from .caching import aget_or_set_catalog, get_or_set_catalog
+from .models import Category
+from .shopper import aget_shopper_state, get_shopper_state
 
 def categories(request):
-    cats = cache.get('active_categories')
+    cats = getattr(request, '_active_categories', None)
     if cats is None:
-        cats = list(Category.objects.filter(is_active=True))
-        cache.set('active_categories', cats, 300)  # cache for 5 minutes
+        cats = get_or_set_catalog(
+            'active_categories', lambda: list(Category.objects.filter(is_active=True))
+        )
     return {'categories': cats}
 
-def cart_count(request):
-    count = 0
-    if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            count = cart.get_total_items()
-        except Cart.DoesNotExist:
-            count = 0
-    return {'cart_count': count}
+def shopper(request):
+    """Cart count, cart map and wishlist ids, queried only if a template reads them."""
+    state = get_shopper_state(request)
+    return {
+        'cart_count': SimpleLazyObject(lambda: state.cart_count),
+        'cart_items_map': SimpleLazyObject(lambda: state.cart_items_map),
+        'wishlist_ids': SimpleLazyObject(lambda: state.wishlist_ids),
+    }
 
-def cart_items_map(request):
-    cart_map = {}
-    if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            cart_map = dict(cart.items.values_list('product_id', 'quantity'))
-        except Cart.DoesNotExist:
-            pass
-    return {'cart_items_map': cart_map}
+async def aload_context(request):
+    """Load what the processors above read using the async ORM.
 
-def wishlist_ids(request):
-    ids = set()
-    if request.user.is_authenticated:
-        wl = Wishlist.objects.filter(user=request.user).first()
-        if wl:
-            ids = set(wl.products.values_list('id', flat=True))
-    return {'wishlist_ids': ids}
\ No newline at end of file
+    Context processors run synchronously during rendering; async views await
+    this first so the user, categories and shopper state are already in
+    memory and the render does not block on those queries.
+    """
+    async def active_categories():
+        return [category async for category in Category.objects.filter(is_active=True)]
+
+    request.user = await request.auser()
+    request._active_categories = await aget_or_set_catalog('active_categories', active_categories)
+    await aget_shopper_state(request)
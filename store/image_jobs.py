@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.apps import apps
+from django.utils import timezone
+
+from .caching import bump_catalog_version
+from .images import refresh_derivatives, strip_stored_metadata
+from .models import ImageJob
+
+MAX_ATTEMPTS = 3
+# A RUNNING job older than this is assumed to belong to a worker that died
+STALE_AFTER = timedelta(minutes=15)
+
+
+def needs_derivatives(instance):
+    """Whether ``instance``'s stored derivatives were built from a different image."""
+    return (instance.image_variants or {}).get('source') != (instance.image.name or None)
+
+
+def enqueue(instance):
+    """Queue a derivative build for ``instance``, folding into a job that has not started yet."""
+    label = instance._meta.label_lower
+    source = instance.image.name or ''
+    updated = ImageJob.objects.filter(
+        model_label=label, object_id=instance.pk, status=ImageJob.PENDING
+    ).update(source=source)
+    if not updated:
+        ImageJob.objects.create(model_label=label, object_id=instance.pk, source=source)
+
+
+def enqueue_new(instances):
+    """Queue derivative builds for freshly bulk-created ``instances`` that have an image, in one INSERT.
+
+    bulk_create() sends no post_save, so nothing else queues these.
+    """
+    ImageJob.objects.bulk_create([
+        ImageJob(model_label=instance._meta.label_lower, object_id=instance.pk, source=instance.image.name)
+        for instance in instances if instance.image
+    ])
+
+
+def requeue_stale():
+    """Put jobs abandoned by a crashed worker back in the queue."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING, started_at__lt=timezone.now() - STALE_AFTER
+    ).update(status=ImageJob.PENDING, claimed_by='')
+
+
+def claim(limit):
+    """Atomically take up to ``limit`` pending jobs, oldest first, for this worker.
+
+    The conditional UPDATE only succeeds for rows still pending, so several
+    workers can poll the same table without running a job twice.
+    """
+    token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    candidates = ImageJob.objects.filter(status=ImageJob.PENDING).order_by('created_at').values_list('pk', flat=True)[:limit]
+    ImageJob.objects.filter(pk__in=list(candidates), status=ImageJob.PENDING).update(
+        status=ImageJob.RUNNING, claimed_by=token, started_at=timezone.now()
+    )
+    return list(ImageJob.objects.filter(claimed_by=token, status=ImageJob.RUNNING).values_list('pk', flat=True))
+
+
+def run_job(job_id):
+    """Build one job's derivatives; runs inside a worker pool process."""
+    job = ImageJob.objects.get(pk=job_id)
+    try:
+        model = apps.get_model(job.model_label)
+        instance = model.objects.filter(pk=job.object_id).only('pk', 'image', 'image_variants').first()
+        # Deleted objects and superseded uploads have nothing left to do
+        if instance is not None and instance.image.name == job.source:
+            # Imported files skipped the upload-time strip; a stripped original gets new derivatives below
+            stripped = strip_stored_metadata(instance) if instance.image else False
+            if refresh_derivatives(instance) or stripped:
+                bump_catalog_version()
+    except Exception as error:
+        # Any failure is recorded on the job and retried up to MAX_ATTEMPTS
+        failed = job.attempts + 1 >= MAX_ATTEMPTS
+        ImageJob.objects.filter(pk=job_id).update(
+            status=ImageJob.FAILED if failed else ImageJob.PENDING,
+            attempts=job.attempts + 1,
+            error=f'{type(error).__name__}: {error}',
+            claimed_by='',
+            finished_at=timezone.now() if failed else None,
+        )
+        return job_id, False
+
+    ImageJob.objects.filter(pk=job_id).update(
+        status=ImageJob.DONE, attempts=job.attempts + 1, error='', finished_at=timezone.now()
+    )
+    return job_id, True
+
+
+def make_pool(workers=None):
+    """Process pool for run_job().
+
+    Children are spawned rather than forked so none of them inherits the
+    parent's open database connections; each sets Django up once and then
+    keeps its own connection for every job it runs.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+def retry_failed():
+    return ImageJob.objects.filter(status=ImageJob.FAILED).update(
+        status=ImageJob.PENDING, attempts=0, error='', claimed_by='', finished_at=None
+    )
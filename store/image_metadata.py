@@ -0,0 +1,145 @@
+"""Remove location, camera and editing metadata from image files without re-encoding them.
+
+Only metadata containers are dropped; the compressed pixel data is copied
+byte for byte, so a stripped original looks exactly like the upload.
+"""
+import struct
+import zlib
+from io import BytesIO
+
+from PIL import ExifTags, Image
+
+# JPEG markers: APP1 holds EXIF (GPS, camera) and XMP, APP13 Photoshop/IPTC, COM free text
+_JPEG_METADATA_MARKERS = {0xE1, 0xED, 0xFE}
+_JPEG_APP2, _JPEG_SOS = 0xE2, 0xDA
+# Markers with no length field
+_JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_METADATA_CHUNKS = {b'eXIf', b'tEXt', b'zTXt', b'iTXt'}
+_WEBP_METADATA_CHUNKS = {b'EXIF', b'XMP '}
+# VP8X header flags announcing EXIF and XMP chunks
+_WEBP_METADATA_FLAGS = 0x08 | 0x04
+
+
+def strip_metadata(data):
+    """``data`` (JPEG, PNG or WebP bytes) without EXIF, XMP, IPTC or comments, or None if there is nothing to strip.
+
+    JPEG and PNG files keep a minimal EXIF block carrying only the
+    orientation, so pictures taken sideways still display upright. Other
+    formats and files that do not parse are returned as None, untouched.
+    """
+    strip = None
+    if data[:2] == b'\xff\xd8':
+        strip = _strip_jpeg
+    elif data[:8] == _PNG_SIGNATURE:
+        strip = _strip_png
+    elif data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        strip = _strip_webp
+    if strip is None:
+        return None
+    try:
+        return strip(data)
+    except struct.error:
+        # Truncated segment or chunk header
+        return None
+
+
+def _orientation_exif(data):
+    """EXIF bytes (``Exif\\0\\0`` + TIFF) holding only ``data``'s orientation, or b'' if it is upright."""
+    orientation = Image.open(BytesIO(data)).getexif().get(ExifTags.Base.Orientation)
+    if orientation in (None, 1):
+        return b''
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    return exif.tobytes()
+
+
+def _strip_jpeg(data):
+    segments, pos, stripped = [data[:2]], 2, False
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker in _JPEG_STANDALONE:
+            segments.append(data[pos:pos + 2])
+            pos += 2
+            continue
+        if marker == _JPEG_SOS:
+            break
+        end = pos + 2 + struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        segment = data[pos:end]
+        # APP2 also carries the MPF index of extra pictures (phones' MPO files), dropped below
+        if marker in _JPEG_METADATA_MARKERS or (marker == _JPEG_APP2 and segment[4:8] == b'MPF\x00'):
+            stripped = True
+        else:
+            segments.append(segment)
+        pos = end
+
+    # Entropy-coded data escapes 0xFF, so the first EOI after the scans ends the
+    # main picture; MPO files append further pictures, with their own EXIF, after it
+    eoi = data.find(b'\xff\xd9', pos)
+    if eoi == -1:
+        return None
+    scans = data[pos:eoi + 2]
+    if not stripped and eoi + 2 == len(data):
+        return None
+
+    exif = _orientation_exif(data)
+    if exif:
+        # After the JFIF APP0 segment, which must come first when present
+        at = 2 if len(segments) > 1 and segments[1][:2] == b'\xff\xe0' else 1
+        segments.insert(at, b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif)
+    return b''.join(segments) + scans
+
+
+def _png_chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def _strip_png(data):
+    chunks, pos, stripped = [], 8, False
+    while pos + 12 <= len(data):
+        length = struct.unpack('>I', data[pos:pos + 4])[0]
+        kind = data[pos + 4:pos + 8]
+        end = pos + 12 + length
+        if kind in _PNG_METADATA_CHUNKS:
+            stripped = True
+        else:
+            chunks.append((kind, data[pos:end]))
+        pos = end
+        if kind == b'IEND':
+            break
+    if not stripped:
+        return None
+
+    exif = _orientation_exif(data)
+    if exif:
+        # eXIf must come before the image data
+        first_idat = next((i for i, (kind, _) in enumerate(chunks) if kind == b'IDAT'), len(chunks))
+        chunks.insert(first_idat, (b'eXIf', _png_chunk(b'eXIf', exif[len(b'Exif\0\0'):])))
+    return _PNG_SIGNATURE + b''.join(chunk for _, chunk in chunks)
+
+
+def _strip_webp(data):
+    chunks, pos, stripped = [], 12, False
+    while pos + 8 <= len(data):
+        kind = data[pos:pos + 4]
+        size = struct.unpack('<I', data[pos + 4:pos + 8])[0]
+        end = pos + 8 + size + (size & 1)
+        chunk = data[pos:end]
+        if kind in _WEBP_METADATA_CHUNKS:
+            stripped = True
+        elif kind == b'VP8X':
+            chunk = chunk[:8] + bytes([chunk[8] & ~_WEBP_METADATA_FLAGS]) + chunk[9:]
+            chunks.append(chunk)
+        else:
+            chunks.append(chunk)
+        pos = end
+    if not stripped:
+        return None
+    body = b'WEBP' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
@@ -0,0 +1,176 @@
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .image_metadata import strip_metadata
+
+# Longest-edge bounds for each derivative; originals are never upscaled
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 1200,
+}
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVE_ROOT = 'derivatives'
+
+
+def image_models():
+    """Every model whose ``image`` field gets derivatives."""
+    from .models import Category, SubCategory, Product, ProductImage, CarouselImage
+    return [Category, SubCategory, Product, ProductImage, CarouselImage]
+
+
+def derivative_name(source_name, size, fmt):
+    """Storage path for one derivative, e.g. ``derivatives/products/kibble/card.webp``."""
+    stem, _ = posixpath.splitext(source_name)
+    return posixpath.join(DERIVATIVE_ROOT, stem, f'{size}.{"jpg" if fmt == "jpeg" else fmt}')
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency composited onto white, for JPEG."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def strip_stored_metadata(instance, field_name='image'):
+    """Replace ``instance``'s stored original with a copy stripped by strip_metadata().
+
+    Run by the image job after upload, so the request that stores the file
+    does not wait on it; the pixels are copied as uploaded. Saves only the field with an UPDATE, and only if the image did not change
+    meanwhile. Returns True when the original was replaced.
+    """
+    fieldfile = getattr(instance, field_name)
+    try:
+        with fieldfile.open('rb') as source:
+            clean = strip_metadata(source.read())
+    except (OSError, Image.DecompressionBombError):
+        # Missing or unreadable originals are left for refresh_derivatives() to fall back on
+        return False
+    if clean is None:
+        return False
+
+    old_name, storage = fieldfile.name, fieldfile.storage
+    # Content-addressed files may be shared; prune_media reclaims unused ones
+    shared = getattr(storage, 'content_addressed', False)
+    new_name = storage.save(old_name, ContentFile(clean))
+    if not type(instance).objects.filter(pk=instance.pk, **{field_name: old_name}).update(**{field_name: new_name}):
+        if not shared:
+            storage.delete(new_name)
+        return False
+    fieldfile.name = new_name
+    if not shared:
+        storage.delete(old_name)
+    return True
+
+
+def generate_derivatives(fieldfile):
+    """Write every size/format derivative of ``fieldfile`` and describe them.
+
+    Returns the value stored in a model's ``image_variants`` field:
+    ``{'source': name, 'width': w, 'height': h, 'sizes': {size: {'width', 'height', 'webp', 'jpeg'}}}``
+    where ``webp``/``jpeg`` are storage names. Sizes that would not be
+    smaller than a previous one are skipped.
+    """
+    storage = fieldfile.storage
+    with fieldfile.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    variants = {'source': fieldfile.name, 'width': original.width, 'height': original.height, 'sizes': {}}
+    previous = None
+    for size, bound in DERIVATIVE_SIZES.items():
+        image = original.copy()
+        image.thumbnail((bound, bound), Image.Resampling.LANCZOS)
+        if previous == image.size:
+            continue
+        previous = image.size
+
+        entry = {'width': image.width, 'height': image.height}
+        for fmt, (pil_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            converted = _flatten(image) if fmt == 'jpeg' else image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            converted.save(buffer, pil_format, **options)
+            name = derivative_name(fieldfile.name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            entry[fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+        variants['sizes'][size] = entry
+    return variants
+
+
+def delete_derivatives(storage, variants):
+    if getattr(storage, 'content_addressed', False):
+        # Identical images share derivative files; prune_media reclaims unused ones
+        return
+    for entry in (variants or {}).get('sizes', {}).values():
+        for fmt in DERIVATIVE_FORMATS:
+            if entry.get(fmt):
+                storage.delete(entry[fmt])
+
+
+def refresh_derivatives(instance, field_name='image', force=False):
+    """Regenerate ``instance``'s derivatives if its image changed since they were made.
+
+    Saves only ``image_variants`` with an UPDATE so save signals do not fire
+    again. Returns True when derivatives were (re)built or cleared.
+    """
+    fieldfile = getattr(instance, field_name)
+    variants = instance.image_variants or {}
+    if not force and variants.get('source') == (fieldfile.name or None):
+        return False
+
+    delete_derivatives(fieldfile.storage, variants)
+    new_variants = {}
+    if fieldfile:
+        try:
+            new_variants = generate_derivatives(fieldfile)
+        except (OSError, Image.DecompressionBombError):
+            # Missing or unreadable originals fall back to the original URL
+            new_variants = {'source': fieldfile.name, 'sizes': {}}
+
+    instance.image_variants = new_variants
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=new_variants)
+    return True
+
+
+class ResponsiveImage:
+    """srcset-ready URLs for an image field and its ``image_variants``."""
+
+    def __init__(self, fieldfile, variants):
+        self.fieldfile = fieldfile
+        self.variants = variants or {}
+        # Ignore derivatives left over from a previous image
+        self.entries = self.variants.get('sizes', {}) if self.variants.get('source') == fieldfile.name else {}
+
+    def __bool__(self):
+        return bool(self.fieldfile)
+
+    def url(self, size='card', fmt='jpeg'):
+        """URL of the closest derivative at or below ``size``, else the original."""
+        names = list(DERIVATIVE_SIZES)
+        for candidate in reversed(names[:names.index(size) + 1]):
+            entry = self.entries.get(candidate)
+            if entry:
+                return self.fieldfile.storage.url(entry[fmt])
+        return self.fieldfile.url
+
+    def dimensions(self, size='card'):
+        entry = self.entries.get(size)
+        if entry:
+            return entry['width'], entry['height']
+        return self.variants.get('width'), self.variants.get('height')
+
+    def srcset(self, fmt='jpeg'):
+        return ', '.join(
+            f"{self.fieldfile.storage.url(entry[fmt])} {entry['width']}w"
+            for entry in self.entries.values()
+        )
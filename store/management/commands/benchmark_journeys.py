@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from store.benchmarks import JourneyError, compare, load_results, run_benchmark, save_results
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = 'Time scripted shopper and admin journeys and compare them with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shoppers', type=int, default=20, help='Shopper journeys (home to payment)')
+        parser.add_argument('--admins', type=int, default=5, help='Admin journeys (dashboard and orders)')
+        parser.add_argument('--concurrency', type=int, default=1, help='Journeys run at the same time')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed journeys of each kind run first')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', '-o', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Results file to compare against')
+        parser.add_argument('--update-baseline', action='store_true', help='Save these results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency/throughput drift as a fraction (default: 0.25)')
+
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmark(
+                shoppers=options['shoppers'], admins=options['admins'], concurrency=options['concurrency'],
+                seed=options['seed'], warmup=options['warmup'],
+            )
+        except JourneyError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f'{"step":<24}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>9}{"queries":>9}')
+        for step, data in results['steps'].items():
+            self.stdout.write(
+                f'{step:<24}{data["count"]:>7}{data["p50_ms"] or 0:>10.1f}{data["p95_ms"] or 0:>10.1f}'
+                f'{data["p99_ms"] or 0:>10.1f}{data["throughput_rps"]:>9.1f}{data["queries_max"] or 0:>9}'
+            )
+        meta = results['meta']
+        self.stdout.write(f'{meta["throughput_rps"]} req/s overall in {meta["wall_time_s"]}s')
+        for failure in results['failures']:
+            self.stderr.write(failure)
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(f'Saved results to {options["output"]}')
+
+        baseline_path = options['baseline']
+        if options['update_baseline']:
+            os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+            save_results(results, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f'Saved new baseline to {baseline_path}'))
+            return
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --update-baseline to record one'))
+            return
+
+        regressions = compare(results, load_results(baseline_path), options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f'Regression: {regression}')
+            raise CommandError(f'{len(regressions)} regressions against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {baseline_path}'))
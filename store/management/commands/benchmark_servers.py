@@ -0,0 +1,139 @@
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+INTERFACES = ('wsgi', 'asgi')
+DEFAULT_URLS = ['/', '/search/?q=food']
+
+
+async def _fetch(host, port, path):
+    # One connection per request, as nginx proxies to gunicorn without keep-alive.
+    # nginx terminates TLS and says so in X-Forwarded-Proto; without it
+    # SECURE_SSL_REDIRECT would answer every request with a redirect.
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\nX-Forwarded-Proto: https\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def _load(host, port, urls, concurrency, duration):
+    """Hit ``urls`` round-robin from ``concurrency`` clients for ``duration`` seconds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    latencies, errors = [], 0
+
+    async def client(offset):
+        nonlocal errors
+        count = offset
+        while loop.time() < deadline:
+            path = urls[count % len(urls)]
+            count += 1
+            started = time.perf_counter()
+            try:
+                status = await _fetch(host, port, path)
+            except (OSError, ValueError, IndexError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = 'Compare storefront throughput under gunicorn with sync (WSGI) and uvicorn (ASGI) workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', dest='urls', help=f'Path to request, repeatable (default: {" ".join(DEFAULT_URLS)})')
+        parser.add_argument('--interface', action='append', dest='interfaces', choices=INTERFACES, help='Server to run, repeatable (default: both)')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes for each server')
+        parser.add_argument('--concurrency', type=int, default=50, help='Simultaneous clients')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds to measure each server')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Seconds of untimed load before measuring')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or DEFAULT_URLS
+        results = {}
+        for interface in options['interfaces'] or INTERFACES:
+            self.stdout.write(f'Benchmarking {interface} with {options["workers"]} workers, {options["concurrency"]} clients...')
+            server = self._start(interface, urls[0], options)
+            try:
+                asyncio.run(_load(options['host'], options['port'], urls, options['concurrency'], options['warmup']))
+                latencies, errors = asyncio.run(
+                    _load(options['host'], options['port'], urls, options['concurrency'], options['duration'])
+                )
+            finally:
+                self._stop(server)
+            results[interface] = self._report(interface, latencies, errors, options['duration'])
+
+        if len(results) == 2 and results['wsgi']:
+            self.stdout.write(f'ASGI/WSGI throughput: {results["asgi"] / results["wsgi"]:.2f}x')
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _start(self, interface, probe_url, options):
+        env = {**os.environ, 'GUNICORN_INTERFACE': interface}
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+                '--bind', f'{options["host"]}:{options["port"]}',
+                '--workers', str(options['workers']),
+                '--access-logfile', os.devnull,
+            ],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn ({interface}) exited with status {server.returncode}')
+            try:
+                status = asyncio.run(_fetch(options['host'], options['port'], probe_url))
+            except OSError:
+                time.sleep(0.5)
+                continue
+            if status != 200:
+                self._stop(server)
+                if 300 <= status < 400:
+                    raise CommandError(f'gunicorn ({interface}) redirected {probe_url} ({status}); benchmark a URL that answers directly')
+                hint = f'; is {options["host"]} in ALLOWED_HOSTS?' if status == 400 else ''
+                raise CommandError(f'gunicorn ({interface}) answered {status} for {probe_url}{hint}')
+            return server
+        self._stop(server)
+        raise CommandError(f'gunicorn ({interface}) did not start answering within 30s')
+
+    def _stop(self, server):
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+    def _report(self, interface, latencies, errors, duration):
+        throughput = len(latencies) / duration
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100)
+            p50, p95 = cuts[49] * 1000, cuts[94] * 1000
+        else:
+            p50 = p95 = 0.0
+        self.stdout.write(
+            f'  {interface}: {throughput:.1f} req/s, p50 {p50:.1f} ms, p95 {p95:.1f} ms, '
+            f'{len(latencies)} ok, {errors} errors'
+        )
+        return throughput
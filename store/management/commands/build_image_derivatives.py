@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from store.caching import bump_catalog_version
+from store.images import image_models, refresh_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate missing or stale WebP/JPEG derivatives for all catalog images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives that are already up to date')
+
+    def handle(self, *args, **options):
+        built = 0
+        for model in image_models():
+            queryset = model.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image', 'image_variants')
+            count = 0
+            for instance in queryset.iterator(chunk_size=200):
+                if refresh_derivatives(instance, force=options['force']):
+                    count += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count} rebuilt')
+            built += count
+
+        if built:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Built derivatives for {built} images'))
@@ -0,0 +1,60 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from store.caching import bump_catalog_version
+from store.models import Category, Product
+from store.search import index_products
+from store.synthetic import SCALES, SYNTHETIC_PASSWORD, SyntheticData
+
+COUNTS = ['categories', 'subcategories', 'products', 'users', 'reviews', 'orders', 'carts', 'wishlists', 'images']
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic, production-sized data set for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='small', help='Preset row counts (default: small)')
+        for name in COUNTS:
+            parser.add_argument(f'--{name}', type=int, help=f'Override the preset number of {name}')
+        parser.add_argument('--items-per-order', type=int, default=2, help='Average order items per order')
+        parser.add_argument('--days', type=int, default=365, help='Spread timestamps over this many days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='syn', help='Marks every generated slug, username and tracking number')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counts = {name: options[name] if options[name] is not None else SCALES[options['scale']][name] for name in COUNTS}
+        prefix = options['prefix']
+        if (Category.objects.filter(slug__startswith=f'{prefix}-').exists()
+                or User.objects.filter(username__startswith=f'{prefix}-user-').exists()):
+            raise CommandError(f'Synthetic data with prefix "{prefix}" already exists; pass a different --prefix')
+        if counts['products'] and not counts['categories'] * counts['subcategories']:
+            raise CommandError('Products need at least one category and subcategory')
+        if (counts['reviews'] or counts['orders'] or counts['carts'] or counts['wishlists']) and not (counts['products'] and counts['users']):
+            raise CommandError('Reviews, orders, carts and wishlists need products and users')
+
+        data = SyntheticData(
+            seed=options['seed'], prefix=prefix, batch_size=options['batch_size'],
+            days=options['days'], progress=self.stdout.write,
+        )
+        data.generate_images(counts['images'])
+        data.generate_categories(counts['categories'], counts['subcategories'])
+        data.generate_products(counts['products'])
+        data.generate_users(counts['users'])
+        data.generate_reviews(counts['reviews'])
+        data.generate_orders(counts['orders'], options['items_per_order'])
+        data.generate_carts(counts['carts'])
+        data.generate_wishlists(counts['wishlists'])
+
+        # bulk_create() skips the signals that keep these in step, so rebuild them once
+        self.stdout.write('Rebuilding ratings, search index and sales rollups...')
+        generated = Product.objects.filter(slug__startswith=f'{prefix}-p')
+        Product.refresh_ratings(generated)
+        index_products(generated)
+        call_command('rebuild_sales_rollups', batch_size=options['batch_size'], stdout=self.stdout)
+        bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {counts["products"]} products, {counts["users"]} users '
+            f'(password "{SYNTHETIC_PASSWORD}"), {counts["reviews"]} reviews and {counts["orders"]} orders'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from store.catalog_import import IMPORT_BATCH_SIZE, IMPORT_FORMATS, guess_format, import_catalog, read_records
+
+
+class Command(BaseCommand):
+    help = 'Create or update products in bulk from a CSV or JSON Lines catalog file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file with name, subcategory, price, stock, description, slug, is_available and image columns')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['path'])
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.processed} rows processed '
+                f'({result.created} created, {result.updated} updated, {len(result.errors)} skipped)'
+            )
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = import_catalog(read_records(stream, fmt), options['batch_size'], progress)
+        except OSError as error:
+            raise CommandError(f'Could not read {options["path"]}: {error}')
+
+        for line, message in result.errors:
+            self.stderr.write(f'Line {line}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported catalog: {result.created} created, {result.updated} updated, {len(result.errors)} skipped'
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from store.image_jobs import claim, make_pool, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued image derivative jobs across a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+        parser.add_argument('--batch-size', type=int, default=20, help='Jobs claimed per round')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs')
+
+        with make_pool(options['workers']) as pool:
+            while True:
+                job_ids = claim(options['batch_size'])
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                results = list(pool.map(run_job, job_ids))
+                done = sum(1 for _, ok in results if ok)
+                self.stdout.write(f'Processed {len(results)} jobs ({done} done, {len(results) - done} failed)')
+
+        self.stdout.write(self.style.SUCCESS('Image job queue is empty'))
@@ -0,0 +1,54 @@
+import posixpath
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+from store.images import image_models
+
+
+def _walk(storage, path=''):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from _walk(storage, posixpath.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that no model references, including shared content-addressed files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Keep unreferenced files younger than this; they may belong to an upload in progress')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if isinstance(field, models.FileField):
+                    referenced.update(model.objects.exclude(**{f'{field.name}__isnull': True}).values_list(field.name, flat=True))
+        for model in image_models():
+            for variants in model.objects.values_list('image_variants', flat=True).iterator(chunk_size=1000):
+                for entry in (variants or {}).get('sizes', {}).values():
+                    referenced.update(value for key, value in entry.items() if key not in ('width', 'height'))
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        removed = 0
+        resize_root = posixpath.relpath(str(settings.IMAGE_RESIZE_ROOT), str(settings.MEDIA_ROOT))
+        for name in _walk(default_storage):
+            # The resize cache manages its own size
+            if name.startswith(f'{resize_root}/'):
+                continue
+            if name in referenced or default_storage.get_modified_time(name) > cutoff:
+                continue
+            if not options['dry_run']:
+                default_storage.delete(name)
+            removed += 1
+            self.stdout.write(f'{"Would remove" if options["dry_run"] else "Removed"} {name}', self.style.WARNING)
+
+        self.stdout.write(self.style.SUCCESS(f'{removed} unreferenced files {"found" if options["dry_run"] else "removed"}'))
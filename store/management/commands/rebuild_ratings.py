@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized product rating aggregates from reviews'
+
+    def handle(self, *args, **options):
+        updated = Product.refresh_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt ratings for {updated} products'))
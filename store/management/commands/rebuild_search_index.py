@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from store.models import Product
+from store.search import index_products
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text product search index'
+
+    def handle(self, *args, **options):
+        index_products()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Product.objects.count()} products'))
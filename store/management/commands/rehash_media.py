@@ -0,0 +1,42 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+from ameaozon.storage import is_content_addressed
+from store.image_jobs import enqueue, needs_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Move existing uploads to content-addressed names so they can be served as immutable'
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if not isinstance(field, models.FileField):
+                    continue
+                rows = (
+                    model.objects.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                    .values_list('pk', field.name)
+                )
+                for pk, name in rows.iterator(chunk_size=500):
+                    if is_content_addressed(name):
+                        continue
+                    if not default_storage.exists(name):
+                        missing += 1
+                        continue
+                    with default_storage.open(name, 'rb') as original:
+                        new_name = default_storage.save(name, original)
+                    model.objects.filter(pk=pk).update(**{field.name: new_name})
+                    moved += 1
+
+                    # The stored derivatives now describe the old name
+                    if hasattr(model, 'image_variants') and field.name == 'image':
+                        instance = model.objects.get(pk=pk)
+                        if needs_derivatives(instance):
+                            enqueue(instance)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Renamed {moved} files to content hashes ({missing} referenced files were missing). '
+            'Run prune_media to remove the old copies.'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+def backfill_ratings(apps, schema_editor):
+    """Populate rating aggregates from existing reviews."""
+    Product = apps.get_model('store', 'Product')
+    Review = apps.get_model('store', 'Review')
+    from django.db.models import Count, OuterRef, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0)),
+        rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_deduplicate_reviews_and_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
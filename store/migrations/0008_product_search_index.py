@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index + initial tsvectors on PostgreSQL, an FTS5 table on SQLite."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX store_product_search_gin ON store_product USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            "UPDATE store_product p SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(p.name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(s.name, '') || ' ' || coalesce(c.name, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(p.description, '')), 'C') "
+            "FROM store_subcategory s JOIN store_category c ON c.id = s.category_id "
+            "WHERE s.id = p.subcategory_id"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE store_product_fts USING fts5("
+            "name, taxonomy, description, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO store_product_fts (rowid, name, taxonomy, description) "
+            "SELECT p.id, p.name, s.name || ' ' || c.name, p.description FROM store_product p "
+            "JOIN store_subcategory s ON s.id = p.subcategory_id "
+            "JOIN store_category c ON c.id = s.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS store_product_search_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS store_product_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,5 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import Avg
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.conf import settings
 from django.utils import timezone
@@ -10,6 +12,7 @@ class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -33,6 +36,7 @@ class SubCategory(models.Model):
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='subcategories/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -59,8 +63,22 @@ class Product(models.Model):
     stock = models.PositiveIntegerField(default=0)
     is_available = models.BooleanField(default=True)
     image = models.ImageField(upload_to='products/')
+    # Resized WebP/JPEG renditions and their dimensions, kept by store.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Denormalized review aggregates, kept in sync by store.signals
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    # Weighted full-text document on PostgreSQL, maintained by store.search
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='product_recent_idx'),
+            models.Index(fields=['subcategory', '-created_at', '-id'], name='product_subcat_recent_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -71,14 +89,26 @@ class Product(models.Model):
         super().save(*args, **kwargs)
     
     def get_average_rating(self):
-        result = self.reviews.aggregate(avg=Avg('rating'))['avg']
-        return result or 0
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+
+    @classmethod
+    def refresh_ratings(cls, queryset=None):
+        """Recompute rating_sum/rating_count from Review rows in a single UPDATE."""
+        reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(
+            rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0)),
+            rating_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), Value(0)),
+        )
 
 class ProductImage(models.Model):
     """Additional gallery image for a product."""
 
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='products/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"Image for {self.product.name}"
@@ -87,6 +117,7 @@ class CarouselImage(models.Model):
     """Homepage hero carousel slide."""
 
     image = models.ImageField(upload_to='carousel/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     title = models.CharField(max_length=200, blank=True)
     subtitle = models.CharField(max_length=300, blank=True)
     link = models.URLField(blank=True)
@@ -124,4 +155,40 @@ class Wishlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username}'s wishlist"
\ No newline at end of file
+        return f"{self.user.username}'s wishlist"
+
+
+class ImageJob(models.Model):
+    """Queued derivative build for one catalog image, run by the process_image_jobs worker."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='imagejob_queue_idx'),
+            models.Index(fields=['model_label', 'object_id'], name='imagejob_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} #{self.object_id}: {self.source}"
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from ameaozon.metrics import record_cache_lookup
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class CursorPaginator:
+    """Keyset paginator over a stable ordering such as ``('-created_at', '-id')``.
+
+    Each page is a single range query that seeks past the previous page's
+    last row instead of using OFFSET, so deep pages cost the same as the
+    first. The total count is only computed if something reads ``count``,
+    and can be cached under ``count_cache_key``.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-created_at', '-id'),
+                 count_cache_key=None, count_timeout=300):
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = per_page
+        self.fields = [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+        self.count_cache_key = count_cache_key
+        self.count_timeout = count_timeout
+
+    @cached_property
+    def count(self):
+        if self.count_cache_key is None:
+            return self.object_list.count()
+        count = cache.get(self.count_cache_key)
+        record_cache_lookup('result_count', hit=count is not None)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(self.count_cache_key, count, self.count_timeout)
+        return count
+
+    def get_page(self, cursor):
+        """Return the page after (or before) ``cursor``; a missing or bad cursor gives the first page."""
+        queryset, position, backwards = self._page_query(cursor)
+        return self._make_page(list(queryset), position, backwards)
+
+    async def aget_page(self, cursor):
+        """get_page() using the async ORM, for async views."""
+        queryset, position, backwards = self._page_query(cursor)
+        return self._make_page([obj async for obj in queryset], position, backwards)
+
+    def _page_query(self, cursor):
+        position, backwards = self._decode(cursor)
+        queryset = self.object_list
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, backwards))
+            if backwards:
+                queryset = queryset.reverse()
+        return queryset[:self.per_page + 1], position, backwards
+
+    def _make_page(self, rows, position, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            return CursorPage(rows, self, has_previous=has_more, has_next=True)
+        return CursorPage(rows, self, has_previous=position is not None, has_next=has_more)
+
+    def _seek(self, position, backwards):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), per field direction
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != backwards else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[i]})
+            for j, (prev_name, _) in enumerate(self.fields[:i]):
+                term &= Q(**{prev_name: position[j]})
+            condition |= term
+        return condition
+
+    def encode(self, obj, backwards=False):
+        position = [_encode_value(getattr(obj, name)) for name, _ in self.fields]
+        payload = json.dumps({'p': position, 'b': backwards}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            raw = payload['p']
+            if len(raw) != len(self.fields):
+                return None, False
+            position = [self._to_python(name, value) for (name, _), value in zip(self.fields, raw)]
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            return None, False
+        return position, bool(payload.get('b'))
+
+    def _to_python(self, name, value):
+        try:
+            field = self.object_list.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations such as a search rank are stored as plain JSON values
+            return value
+        return field.to_python(value)
+
+
+class CursorPage:
+    """One page from a CursorPaginator; iterable like a Paginator page."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous and bool(object_list)
+        self._has_next = has_next and bool(object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        return self.paginator.encode(self.object_list[-1]) if self._has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self.paginator.encode(self.object_list[0], backwards=True) if self._has_previous else None
@@ -0,0 +1,126 @@
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import locks
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Extension -> (Pillow format, save options) for the formats we re-encode
+RESIZE_FORMATS = {
+    '.jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    '.jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    '.png': ('PNG', {'optimize': True}),
+    '.webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+SIZE_KEY = 'resize:cache-bytes'
+
+
+class ResizeCache:
+    """Bounded on-disk cache of resized media, laid out as ``<root>/<width>/<path>``.
+
+    The layout mirrors the public URL so nginx can serve hits straight from
+    disk; only misses reach Django. A per-file lock stops concurrent
+    requests for the same variant from rendering it twice, and once the
+    tracked size passes ``max_bytes`` the least recently used files are
+    evicted. Recency is the later of a file's atime and mtime, since hits
+    served by nginx never pass through here.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = str(root or settings.IMAGE_RESIZE_ROOT)
+        self.max_bytes = max_bytes or settings.IMAGE_RESIZE_CACHE_MAX_BYTES
+
+    def path(self, width, name):
+        return os.path.join(self.root, str(width), *name.split('/'))
+
+    def get_or_create(self, width, name):
+        """Filesystem path of ``name`` resized to ``width``, rendering it on a miss."""
+        target = self.path(width, name)
+        if os.path.exists(target):
+            return target
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(f'{target}.lock', 'wb') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                # Another worker may have finished it while we waited for the lock
+                if not os.path.exists(target):
+                    size = self._render(width, name, target)
+                    self._account(size)
+            finally:
+                locks.unlock(lock_file)
+        try:
+            os.remove(f'{target}.lock')
+        except FileNotFoundError:
+            pass
+        return target
+
+    def _render(self, width, name, target):
+        extension = posixpath.splitext(name)[1].lower()
+        pil_format, options = RESIZE_FORMATS[extension]
+        with default_storage.open(name, 'rb') as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            image.load()
+        image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        # Write to a temporary file and rename, so readers never see a partial image
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                image.save(output, pil_format, **options)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return os.path.getsize(target)
+
+    def _files(self):
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.lock', '.tmp')):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat
+
+    def total_bytes(self):
+        return sum(stat.st_size for _, stat in self._files())
+
+    def _account(self, added):
+        try:
+            total = cache.incr(SIZE_KEY, added)
+        except ValueError:
+            total = self.total_bytes()
+            cache.set(SIZE_KEY, total, None)
+        if total > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_ratio=0.9):
+        """Delete least recently used files until the cache is under ``target_ratio`` of its limit."""
+        files = sorted(self._files(), key=lambda item: max(item[1].st_atime, item[1].st_mtime))
+        total = sum(stat.st_size for _, stat in files)
+        limit = self.max_bytes * target_ratio
+        removed = 0
+        for path, stat in files:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+            removed += 1
+        cache.set(SIZE_KEY, total, None)
+        return removed
+
+
+def can_resize(name):
+    return posixpath.splitext(name)[1].lower() in RESIZE_FORMATS
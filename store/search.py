@@ -0,0 +1,100 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Concat
+
+from .models import Product, SubCategory
+
+FTS_TABLE = 'store_product_fts'
+SEARCH_CONFIG = 'english'
+# bm25 column weights for (name, taxonomy, description)
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_products(query):
+    """Products matching every term of ``query`` as a prefix, best match first.
+
+    PostgreSQL ranks against the GIN-indexed ``Product.search_vector``; SQLite
+    uses the FTS5 table kept by index_products(). Name matches outrank
+    subcategory/category names, which outrank the description. Other
+    backends fall back to an unranked ``icontains`` scan.
+    """
+    terms = _terms(query)
+    if not terms:
+        return Product.objects.none()
+
+    if connection.vendor == 'postgresql':
+        tsquery = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG
+        )
+        return (
+            Product.objects.filter(search_vector=tsquery)
+            # ts_rank() returns real; as double precision the value a cursor
+            # stores in JSON compares equal to the one the seek reads back
+            .annotate(rank=Cast(SearchRank(F('search_vector'), tsquery), FloatField()))
+            .order_by('-rank', '-created_at')
+        )
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        return (
+            Product.objects.filter(
+                id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+            )
+            .annotate(rank=RawSQL(
+                # bm25() is lower-is-better; negate so both backends sort on -rank
+                f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {Product._meta.db_table}.id',
+                (match,),
+            ))
+            .order_by('-rank', '-created_at')
+        )
+
+    return Product.objects.filter(
+        Q(name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(subcategory__name__icontains=query) |
+        Q(subcategory__category__name__icontains=query)
+    ).distinct().annotate(rank=Value(0.0, output_field=FloatField())).order_by('-rank', '-created_at')
+
+
+def index_products(queryset=None):
+    """Refresh the search index entries for ``queryset`` (all products by default)."""
+    queryset = Product.objects.all() if queryset is None else queryset
+
+    if connection.vendor == 'postgresql':
+        taxonomy = SubCategory.objects.filter(pk=OuterRef('subcategory_id')).annotate(
+            text=Concat('name', Value(' '), 'category__name')
+        ).values('text')
+        queryset.update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Subquery(taxonomy), weight='B', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        ))
+
+    elif connection.vendor == 'sqlite':
+        rows = list(queryset.values_list(
+            'id', 'name', 'subcategory__name', 'subcategory__category__name', 'description'
+        ))
+        # One transaction, so SQLite syncs to disk once rather than per row
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, taxonomy, description) VALUES (%s, %s, %s, %s)',
+                [(pk, name, f'{sub} {cat}', desc) for pk, name, sub, cat, desc in rows],
+            )
+
+
+def unindex_product(product_id):
+    """Drop a deleted product from the SQLite index (PostgreSQL rows go with the product)."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
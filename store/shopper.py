@@ -0,0 +1,65 @@
+from django.utils.functional import cached_property
+from .models import Wishlist
+from orders.models import CartItem
+
+
+class ShopperState:
+    """Per-request cart and wishlist snapshot for the current user.
+
+    Each piece is loaded on first access only: cart quantities in one query,
+    wishlist ids in another. Anonymous users never touch the database.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def cart_items_map(self):
+        if not self.user.is_authenticated:
+            return {}
+        return dict(
+            CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity')
+        )
+
+    @cached_property
+    def cart_count(self):
+        return sum(self.cart_items_map.values())
+
+    @cached_property
+    def wishlist_ids(self):
+        if not self.user.is_authenticated:
+            return set()
+        return set(
+            Wishlist.products.through.objects.filter(wishlist__user=self.user)
+            .values_list('product_id', flat=True)
+        )
+
+    async def aload(self):
+        """Fill every piece with the async ORM, so later sync reads never query."""
+        cart_items_map, wishlist_ids = {}, set()
+        if self.user.is_authenticated:
+            cart_items_map = {
+                product_id: quantity async for product_id, quantity in
+                CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity')
+            }
+            wishlist_ids = {
+                product_id async for product_id in
+                Wishlist.products.through.objects.filter(wishlist__user=self.user)
+                .values_list('product_id', flat=True)
+            }
+        self.__dict__.update(cart_items_map=cart_items_map, wishlist_ids=wishlist_ids)
+        return self
+
+
+def get_shopper_state(request):
+    """Return the ShopperState shared by everything handling this request."""
+    if not hasattr(request, '_shopper_state'):
+        request._shopper_state = ShopperState(request.user)
+    return request._shopper_state
+
+
+async def aget_shopper_state(request):
+    """get_shopper_state() for async views, with the user and state already loaded."""
+    if not hasattr(request, '_shopper_state'):
+        request._shopper_state = await ShopperState(await request.auser()).aload()
+    return request._shopper_state
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .caching import bump_catalog_version
+from .image_jobs import enqueue, needs_derivatives
+from .images import delete_derivatives
+from .models import Category, SubCategory, Product, ProductImage, CarouselImage, Review
+from .search import index_products, unindex_product
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def sync_product_rating(sender, instance, **kwargs):
+    """Keep Product.rating_sum/rating_count in step with its reviews."""
+    Product.refresh_ratings(Product.objects.filter(pk=instance.product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=CarouselImage)
+@receiver(post_delete, sender=CarouselImage)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Any catalog edit moves every worker to a fresh cache namespace."""
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    index_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_deleted_product(sender, instance, **kwargs):
+    unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=SubCategory)
+def reindex_subcategory_products(sender, instance, created, **kwargs):
+    if not created:
+        index_products(Product.objects.filter(subcategory=instance))
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    if not created:
+        index_products(Product.objects.filter(subcategory__category=instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=CarouselImage)
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Hand a newly uploaded image to the process_image_jobs worker for resizing."""
+    if not raw and needs_derivatives(instance):
+        enqueue(instance)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=CarouselImage)
+def remove_image_derivatives(sender, instance, **kwargs):
+    delete_derivatives(instance.image.storage, instance.image_variants)
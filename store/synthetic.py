@@ -0,0 +1,325 @@
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import reset_queries, transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw, ImageFont
+
+from accounts.models import User
+from orders.models import Cart, CartItem, Order, OrderItem
+from .images import generate_derivatives
+from .models import Category, SubCategory, Product, Review, Wishlist
+
+# Row counts per preset; ``subcategories`` is per category
+SCALES = {
+    'small': {
+        'categories': 6, 'subcategories': 6, 'products': 2_000, 'users': 1_000, 'reviews': 10_000,
+        'orders': 20_000, 'carts': 200, 'wishlists': 300, 'images': 12,
+    },
+    'medium': {
+        'categories': 10, 'subcategories': 8, 'products': 20_000, 'users': 50_000, 'reviews': 200_000,
+        'orders': 500_000, 'carts': 5_000, 'wishlists': 10_000, 'images': 24,
+    },
+    'production': {
+        'categories': 12, 'subcategories': 10, 'products': 200_000, 'users': 500_000, 'reviews': 2_000_000,
+        'orders': 5_000_000, 'carts': 50_000, 'wishlists': 100_000, 'images': 48,
+    },
+}
+SYNTHETIC_PASSWORD = 'synthetic'
+
+PETS = ['Cats', 'Dogs', 'Birds', 'Fish', 'Rabbits', 'Hamsters', 'Reptiles', 'Horses', 'Ferrets', 'Turtles', 'Parrots', 'Guinea Pigs']
+GOODS = ['Food', 'Treats', 'Toys', 'Accessories', 'Grooming', 'Beds', 'Bowls', 'Health', 'Cages', 'Leashes', 'Litter', 'Clothing']
+ADJECTIVES = ['Premium', 'Organic', 'Deluxe', 'Classic', 'Crunchy', 'Soft', 'Durable', 'Natural', 'Cozy', 'Sparkly', 'Grain-Free', 'Chewy']
+NOUNS = ['Kibble', 'Bites', 'Ball', 'Rope', 'Brush', 'Cushion', 'Feeder', 'Collar', 'Tunnel', 'Snack Mix', 'Shampoo', 'Harness']
+FIRST_NAMES = ['Rahim', 'Karim', 'Ayesha', 'Nusrat', 'Tanvir', 'Farhana', 'Sakib', 'Mim', 'Arif', 'Sadia', 'Imran', 'Tania']
+LAST_NAMES = ['Hossain', 'Rahman', 'Islam', 'Ahmed', 'Khan', 'Chowdhury', 'Akter', 'Sarkar', 'Uddin', 'Begum']
+CITIES = ['Dhaka', 'Chattogram', 'Khulna', 'Rajshahi', 'Sylhet', 'Barishal', 'Rangpur', 'Mymensingh']
+COMMENTS = ['', '', 'Great quality, my pet loves it.', 'Arrived quickly.', 'Not worth the price.',
+            'Would buy again!', 'Smaller than expected.', 'Five stars from my cat.']
+# Roughly how a year of orders is spread over statuses
+STATUS_WEIGHTS = {'pending': 4, 'processing': 6, 'shipped': 10, 'delivered': 72, 'cancelled': 8}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def skewed(rng, n):
+    """Index in ``range(n)`` biased toward the start, so early rows are the popular ones."""
+    return int(n * rng.random() ** 2)
+
+
+def distinct_picks(rng, n, k):
+    picks = set()
+    k = min(k, n)
+    while len(picks) < k:
+        picks.add(skewed(rng, n))
+    return picks
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create() store the created_at/updated_at values we set, instead of now()."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def placeholder_image(rng, label, size=800):
+    """JPEG bytes of a flat-colour square with a few shapes and ``label``."""
+    background = tuple(rng.randint(70, 210) for _ in range(3))
+    image = Image.new('RGB', (size, size), background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(5):
+        x, y, radius = rng.randint(0, size), rng.randint(0, size), rng.randint(size // 12, size // 4)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    draw.text((size // 12, size - size // 6), label, fill='white', font=ImageFont.load_default(size=size // 12))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class SyntheticData:
+    """Deterministic, batched generator of catalog, customer and order rows.
+
+    Every phase draws from its own ``Random`` seeded with ``seed`` and the
+    phase name, so the same seed and counts always produce the same rows
+    (only timestamps move, as the generated window ends at the time of the run).
+    Rows go in with bulk_create() ``batch_size`` at a time and only compact
+    arrays of generated ids (and product prices) are kept in memory, so
+    millions of orders need no more memory than a few thousand. Every
+    unique value carries ``prefix`` so a second run can use another prefix.
+    """
+
+    def __init__(self, seed=42, prefix='syn', batch_size=5000, days=365, progress=None):
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.end = timezone.now()
+        self.start = self.end - timedelta(days=days)
+        self.progress = progress or (lambda message: None)
+        self.images = []
+        self.subcategory_ids = []
+        self.product_ids = array('q')
+        self.product_cents = array('q')
+        self.user_ids = array('q')
+
+    def rng(self, phase):
+        return random.Random(f'{self.seed}:{phase}')
+
+    def timestamp(self, rng, position, total):
+        """A time in the generated window, rising with ``position`` so ids follow creation order."""
+        return self.start + (self.end - self.start) * ((position + rng.random()) / max(total, 1))
+
+    def _batch_done(self, label, done, total):
+        # With DEBUG on, Django keeps the SQL of recent queries, and these inserts are large
+        reset_queries()
+        if done == total or done % (self.batch_size * 20) == 0:
+            self.progress(f'{label}: {done}/{total}')
+
+    def generate_images(self, count):
+        """Save ``count`` placeholder images and build their derivatives once, for every row to share."""
+        rng = self.rng('images')
+        for n in range(count):
+            name = default_storage.save(f'products/{self.prefix}-placeholder.jpg', ContentFile(
+                placeholder_image(rng, f'Ameaozon #{n + 1}')
+            ))
+            self.images.append((name, generate_derivatives(Product(image=name).image)))
+        self.progress(f'Images: {count}/{count}')
+
+    def _image(self, n):
+        if not self.images:
+            return '', {}
+        return self.images[n % len(self.images)]
+
+    def generate_categories(self, categories, per_category):
+        rng = self.rng('categories')
+        for n in range(categories):
+            name = PETS[n % len(PETS)] + (f' {n // len(PETS) + 1}' if n >= len(PETS) else '')
+            image, variants = self._image(n)
+            category = Category.objects.create(
+                name=name, slug=f'{self.prefix}-c{n}', image=image, image_variants=variants,
+            )
+            subcategories = SubCategory.objects.bulk_create([
+                SubCategory(
+                    category=category, name=f'{name} {goods}', slug=f'{self.prefix}-c{n}-s{i}',
+                    description=f'Everything for {name.lower()}: {goods.lower()} and more.',
+                    image=self._image(n + i + 1)[0],
+                    image_variants=self._image(n + i + 1)[1],
+                )
+                for i, goods in enumerate(rng.sample(GOODS, min(per_category, len(GOODS))))
+            ])
+            self.subcategory_ids.extend(subcategory.pk for subcategory in subcategories)
+        self.progress(f'Categories: {categories}/{categories} with {len(self.subcategory_ids)} subcategories')
+
+    def generate_products(self, count):
+        rng = self.rng('products')
+
+        def rows():
+            for n in range(count):
+                name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}'
+                image, variants = self._image(n)
+                created_at = self.timestamp(rng, n, count)
+                yield Product(
+                    subcategory_id=self.subcategory_ids[n % len(self.subcategory_ids)],
+                    name=name,
+                    slug=f'{self.prefix}-p{n}',
+                    description=f'{name} made for happy pets. ' * rng.randint(1, 4),
+                    price=Decimal(rng.randint(99, 500_000)) / 100,
+                    stock=0 if rng.random() < 0.05 else rng.randint(1, 500),
+                    is_available=rng.random() > 0.02,
+                    image=image,
+                    image_variants=variants,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+        with explicit_timestamps(Product):
+            for batch in batched(rows(), self.batch_size):
+                Product.objects.bulk_create(batch)
+                for product in batch:
+                    self.product_ids.append(product.pk)
+                    self.product_cents.append(int(product.price * 100))
+                self._batch_done('Products', len(self.product_ids), count)
+
+    def generate_users(self, count):
+        rng = self.rng('users')
+        password = make_password(SYNTHETIC_PASSWORD)
+
+        def rows():
+            for n in range(count):
+                yield User(
+                    username=f'{self.prefix}-user-{n}',
+                    email=f'{self.prefix}.user{n}@example.com',
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    phone_number=f'017{rng.randrange(10 ** 8):08d}',
+                    address=f'House {rng.randint(1, 200)}, Road {rng.randint(1, 40)}, {rng.choice(CITIES)}',
+                    date_joined=self.timestamp(rng, n, count),
+                )
+
+        for batch in batched(rows(), self.batch_size):
+            User.objects.bulk_create(batch)
+            self.user_ids.extend(user.pk for user in batch)
+            self._batch_done('Users', len(self.user_ids), count)
+
+    def generate_reviews(self, count):
+        """``count`` reviews spread over users, each reviewing distinct, mostly popular products."""
+        rng = self.rng('reviews')
+        users, products = len(self.user_ids), len(self.product_ids)
+
+        def rows():
+            position = 0
+            for u in range(users):
+                per_user = count // users + (1 if u < count % users else 0)
+                for p in distinct_picks(rng, products, per_user):
+                    created_at = self.timestamp(rng, position, count)
+                    position += 1
+                    yield Review(
+                        product_id=self.product_ids[p], user_id=self.user_ids[u],
+                        rating=rng.choices([1, 2, 3, 4, 5], weights=[5, 5, 15, 35, 40])[0],
+                        comment=rng.choice(COMMENTS), created_at=created_at,
+                    )
+
+        done = 0
+        with explicit_timestamps(Review):
+            for batch in batched(rows(), self.batch_size):
+                Review.objects.bulk_create(batch)
+                done += len(batch)
+                self._batch_done('Reviews', done, count)
+
+    def generate_orders(self, count, items_per_order=2):
+        """``count`` orders over the window, each with 1 to ``2 * items_per_order - 1`` items."""
+        rng = self.rng('orders')
+        statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+        methods = [value for value, _ in Order.PAYMENT_CHOICES]
+        products = len(self.product_ids)
+
+        def rows():
+            for n in range(count):
+                u = skewed(rng, len(self.user_ids))
+                lines = [
+                    (self.product_ids[p], self.product_cents[p], rng.choices([1, 2, 3], weights=[80, 15, 5])[0])
+                    for p in distinct_picks(rng, products, rng.randint(1, 2 * items_per_order - 1))
+                ]
+                status = rng.choices(statuses, weights)[0]
+                method = rng.choice(methods)
+                created_at = self.timestamp(rng, n, count)
+                order = Order(
+                    user_id=self.user_ids[u],
+                    tracking_number=f'{self.prefix.upper()}{n:012d}',
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'{self.prefix}.user{u}@example.com',
+                    phone=f'018{rng.randrange(10 ** 8):08d}',
+                    address=f'House {rng.randint(1, 200)}, Road {rng.randint(1, 40)}',
+                    city=rng.choice(CITIES),
+                    postal_code=str(rng.randint(1000, 9999)),
+                    status=status,
+                    payment_method=method,
+                    payment_completed=status == 'delivered' or (method != 'cash_on_delivery' and status != 'cancelled'),
+                    total_price=Decimal(sum(cents * quantity for _, cents, quantity in lines)) / 100,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                yield order, lines
+
+        done = 0
+        with explicit_timestamps(Order):
+            for batch in batched(rows(), self.batch_size):
+                with transaction.atomic():
+                    Order.objects.bulk_create([order for order, _ in batch])
+                    OrderItem.objects.bulk_create(
+                        [
+                            OrderItem(order_id=order.pk, product_id=product_id, price=Decimal(cents) / 100, quantity=quantity)
+                            for order, lines in batch for product_id, cents, quantity in lines
+                        ],
+                        batch_size=self.batch_size,
+                    )
+                done += len(batch)
+                self._batch_done('Orders', done, count)
+
+    def generate_carts(self, count, max_items=4):
+        rng = self.rng('carts')
+        owners = rng.sample(range(len(self.user_ids)), min(count, len(self.user_ids)))
+        for done, batch in enumerate(batched(owners, self.batch_size), start=1):
+            with transaction.atomic():
+                carts = Cart.objects.bulk_create([Cart(user_id=self.user_ids[u]) for u in batch])
+                CartItem.objects.bulk_create([
+                    CartItem(cart_id=cart.pk, product_id=self.product_ids[p], quantity=rng.randint(1, 3))
+                    for cart in carts for p in distinct_picks(rng, len(self.product_ids), rng.randint(1, max_items))
+                ])
+            self._batch_done('Carts', min(done * self.batch_size, len(owners)), len(owners))
+
+    def generate_wishlists(self, count, max_items=8):
+        rng = self.rng('wishlists')
+        owners = rng.sample(range(len(self.user_ids)), min(count, len(self.user_ids)))
+        through = Wishlist.products.through
+        for done, batch in enumerate(batched(owners, self.batch_size), start=1):
+            with transaction.atomic():
+                wishlists = Wishlist.objects.bulk_create([Wishlist(user_id=self.user_ids[u]) for u in batch])
+                through.objects.bulk_create([
+                    through(wishlist_id=wishlist.pk, product_id=self.product_ids[p])
+                    for wishlist in wishlists for p in distinct_picks(rng, len(self.product_ids), rng.randint(1, max_items))
+                ])
+            self._batch_done('Wishlists', min(done * self.batch_size, len(owners)), len(owners))
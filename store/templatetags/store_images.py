@@ -0,0 +1,53 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+from django.urls import reverse
+
+from store.images import ResponsiveImage
+
+register = template.Library()
+
+# Default ``sizes`` hints matching the layouts each derivative is used in
+SIZES_HINTS = {
+    'thumb': '160px',
+    'card': '(min-width: 1024px) 25vw, 50vw',
+    'detail': '(min-width: 1024px) 50vw, 100vw',
+}
+
+
+@register.simple_tag
+def responsive_image(obj, size='card', sizes=None, field='image', **attrs):
+    """Render ``obj``'s image as a <picture> with WebP and JPEG srcsets.
+
+    ``size`` picks the fallback ``src`` and intrinsic dimensions; any extra
+    keyword (``alt``, ``class``, ``loading``...) becomes an <img> attribute.
+    Objects without generated derivatives render a plain <img> of the original.
+    """
+    image = ResponsiveImage(getattr(obj, field), getattr(obj, f'{field}_variants', None))
+    if not image:
+        return ''
+
+    width, height = image.dimensions(size)
+    img_attrs = {'src': image.url(size), 'loading': 'lazy', 'decoding': 'async'}
+    if width and height:
+        img_attrs.update(width=width, height=height)
+    img_attrs.update({key.replace('_', '-'): value for key, value in attrs.items()})
+    img_attrs.setdefault('alt', '')
+
+    if not image.entries:
+        return format_html('<img{}>', flatatt(img_attrs))
+
+    sizes = sizes or SIZES_HINTS[size]
+    img_attrs.update(srcset=image.srcset('jpeg'), sizes=sizes)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img{}></picture>',
+        image.srcset('webp'), sizes, flatatt(img_attrs),
+    )
+
+
+@register.filter
+def resized(fieldfile, width):
+    """URL of ``fieldfile`` scaled to ``width`` pixels; ``width`` must be in IMAGE_RESIZE_WIDTHS."""
+    if not fieldfile:
+        return ''
+    return reverse('store:resized_image', args=[int(width), fieldfile.name])
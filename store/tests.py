@@ -1,3 +1,350 @@
-from django.test import TestCase
+import logging
+import shutil
+import tempfile
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import URLPattern, reverse
+from PIL import Image
+
+from accounts.models import User
+from ameaozon.middleware import install_query_recording, record_queries
+from orders.models import Cart, CartItem, Order, OrderItem
+from .autocomplete import rebuild_prefix_index
+from .image_jobs import run_job
+from .image_metadata import strip_metadata
+from .models import Category, SubCategory, Product, CarouselImage, ImageJob, Review, Wishlist
+from .pagination import CursorPaginator
+from .search import search_products
+
+# Apps whose named URLs the matrix walks; a new URL joins it automatically
+MATRIX_APPS = ['store', 'orders', 'payment', 'dashboard', 'accounts']
+
+# Arguments for URLs that take them, built from the fixture
+URL_ARGS = {
+    'store:category_detail': lambda f: [f.category.slug],
+    'store:subcategory_detail': lambda f: [f.category.slug, f.subcategory.slug],
+    'store:product_detail': lambda f: [f.product.slug],
+    'store:resized_image': lambda f: [240, 'products/matrix.jpg'],
+    'store:add_to_wishlist': lambda f: [f.product.pk],
+    'store:remove_from_wishlist': lambda f: [f.product.pk],
+    'orders:cart_add': lambda f: [f.product.pk],
+    'orders:cart_remove': lambda f: [f.product.pk],
+    'orders:cart_update': lambda f: [f.product.pk],
+    'orders:order_complete': lambda f: [f.order.tracking_number],
+    'orders:track_order_detail': lambda f: [f.order.tracking_number],
+    'payment:payment_process': lambda f: [f.order.tracking_number],
+    'payment:payment_complete': lambda f: [f.order.tracking_number],
+    'payment:payment_canceled': lambda f: [f.order.tracking_number],
+    'dashboard:category_edit': lambda f: [f.category.pk],
+    'dashboard:subcategory_edit': lambda f: [f.subcategory.pk],
+    'dashboard:product_edit': lambda f: [f.product.pk],
+    'dashboard:order_detail': lambda f: [f.order.tracking_number],
+    'dashboard:update_order_status': lambda f: [f.order.tracking_number],
+    'dashboard:carousel_edit': lambda f: [f.carousel.pk],
+    'dashboard:carousel_toggle_active': lambda f: [f.carousel.pk],
+    'dashboard:carousel_delete': lambda f: [f.carousel.pk],
+}
+
+URL_QUERY = {
+    'store:search': {'q': 'Kibble'},
+    'store:autocomplete': {'q': 'Kib'},
+}
+
+# POSTs with valid payloads, so POST-only views are counted doing their work
+# instead of answering 405: (URL name, role) -> (payload, expected status).
+# Payloads are built before queries are recorded.
+URL_POSTS = {
+    ('orders:cart_add', 'customer'): (lambda f: {'quantity': 1}, 302),
+    ('orders:cart_update', 'customer'): (lambda f: {'quantity': 2}, 302),
+    ('orders:checkout', 'customer'): (lambda f: {
+        'first_name': 'Matrix', 'last_name': 'Customer', 'email': 'customer@example.com', 'phone': '01712345678',
+        'address': 'House 1', 'city': 'Dhaka', 'postal_code': '1207', 'payment_method': 'card',
+    }, 302),
+    ('payment:payment_complete', 'customer'): (lambda f: {}, 302),
+    ('dashboard:bulk_update_order_status', 'admin'): (lambda f: {'status': 'processing', 'order_ids': f.order_ids()}, 302),
+    ('dashboard:product_import', 'admin'): (lambda f: {'file': f.catalog_upload()}, 302),
+}
+
+
+def named_urls():
+    for app in MATRIX_APPS:
+        module = import_module(f'{app}.urls')
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{module.app_name}:{pattern.name}', bool(pattern.pattern.converters)
+
+
+class MatrixFixture:
+    """Catalog, customer and order rows that grow together, so every list a page shows grows too.
+
+    One category holds every product; the customer has every product in
+    their cart and wishlist, one order per product and a first order that
+    carries every product; the first product has a review per product.
+    """
+
+    def __init__(self):
+        self.customer = User.objects.create_user('matrix-customer', 'customer@example.com', 'pw')
+        self.admin = User.objects.create_user('matrix-admin', 'admin@example.com', 'pw', user_type=User.ADMIN)
+        self.cart = Cart.objects.create(user=self.customer)
+        self.wishlist = Wishlist.objects.create(user=self.customer)
+        self.size = 0
+        self.categories = []
+        self.products = []
+
+    @property
+    def category(self):
+        return self.categories[0]
+
+    @property
+    def subcategory(self):
+        return self.category.subcategories.first()
+
+    @property
+    def product(self):
+        return self.products[0]
+
+    @property
+    def order(self):
+        return self.customer.orders.order_by('pk').first()
+
+    @property
+    def carousel(self):
+        return CarouselImage.objects.order_by('pk').first()
+
+    def order_ids(self):
+        return [str(pk) for pk in self.customer.orders.values_list('pk', flat=True)]
+
+    def catalog_upload(self):
+        """A CSV that updates every product and adds one more."""
+        lines = ['name,subcategory,price,stock,slug']
+        lines += [f'{product.name},{self.subcategory.slug},8.99,50,{product.slug}' for product in self.products]
+        lines.append(f'Imported Kibble,{self.subcategory.slug},7.99,10,')
+        return SimpleUploadedFile('catalog.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+    def grow(self, size):
+        for n in range(self.size, size):
+            category = Category.objects.create(name=f'Matrix {n}', slug=f'matrix-{n}')
+            SubCategory.objects.create(category=category, name=f'Matrix {n} Food', slug=f'matrix-{n}-food')
+            self.categories.append(category)
+            product = Product.objects.create(
+                subcategory=self.subcategory, name=f'Kibble {n}', slug=f'kibble-{n}',
+                description='Kibble for the matrix.', price=Decimal('9.99'), stock=100,
+            )
+            self.products.append(product)
+            reviewer = User.objects.create_user(f'matrix-reviewer-{n}')
+            Review.objects.create(product=self.product, user=reviewer, rating=n % 5 + 1, comment='Fine.')
+            CartItem.objects.create(cart=self.cart, product=product)
+            self.wishlist.products.add(product)
+            order = Order.objects.create(
+                user=self.customer, first_name='Matrix', last_name='Customer', email='customer@example.com',
+                phone='01712345678', address='House 1', city='Dhaka', postal_code='1207',
+                payment_method='card', total_price=product.price,
+            )
+            OrderItem.objects.create(order=order, product=product, price=product.price)
+            if n:
+                OrderItem.objects.create(order=self.order, product=product, price=product.price)
+            CarouselImage.objects.create(image=f'carousel/matrix-{n}.jpg', title=f'Slide {n}')
+            ImageJob.objects.create(
+                model_label='store.product', object_id=product.pk, source='products/matrix.jpg',
+                status=ImageJob.FAILED, error='Missing file.',
+            )
+        self.size = size
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    # The manifest only exists after collectstatic
+    STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+)
+class QueryCountMatrixTests(TestCase):
+    """Every named URL runs as many queries with 100 rows per page as with 1, for every kind of visitor."""
+
+    SIZES = [1, 10, 100]
+    ROLES = ['anonymous', 'customer', 'admin']
+
+    def setUp(self):
+        install_query_recording()
+        self.fixture = MatrixFixture()
+        # 403, 404 and 405 answers are expected here; their warnings would drown the report
+        request_logger = logging.getLogger('django.request')
+        self.addCleanup(request_logger.setLevel, request_logger.level)
+        request_logger.setLevel(logging.ERROR)
+        # Rebuild the autocomplete index inline on every version check: a background
+        # thread could not see this test's uncommitted rows
+        for patcher in [mock.patch('store.autocomplete._start_rebuild', rebuild_prefix_index),
+                        mock.patch('store.autocomplete.VERSION_CHECK_INTERVAL', 0)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def request(self, role, name, needs_args, data=None):
+        if needs_args and name not in URL_ARGS:
+            self.fail(f'{name} takes arguments; add it to URL_ARGS')
+        url = reverse(name, args=URL_ARGS[name](self.fixture) if needs_args else None)
+        # A logout in an earlier step must not change who the next one runs as
+        self.client.logout()
+        if role != 'anonymous':
+            self.client.force_login(getattr(self.fixture, role))
+        # Cached pages and fragments would hide the queries behind them
+        cache.clear()
+        if data is None:
+            with record_queries(trace=True) as queries:
+                response = self.client.get(url, URL_QUERY.get(name), secure=True)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            return response.status_code, queries
+        # Roll the POST back so every step, and every size, sees the fixture as grown
+        with transaction.atomic():
+            with record_queries(trace=True) as queries:
+                response = self.client.post(url, data, secure=True)
+            transaction.set_rollback(True)
+        return response.status_code, queries
+
+    def walk(self):
+        results = {}
+        for name, needs_args in named_urls():
+            for role in self.ROLES:
+                results[name, role, 'GET'] = self.request(role, name, needs_args)
+        for (name, role), (payload, _) in URL_POSTS.items():
+            results[name, role, 'POST'] = self.request(role, name, name in URL_ARGS, payload(self.fixture))
+        return results
+
+    def assertExpectedStatus(self, name, role, method, status):
+        if method == 'POST':
+            self.assertEqual(status, URL_POSTS[name, role][1], f'POST {name} as {role} answered {status}')
+
+    def test_query_counts_do_not_grow_with_data(self):
+        self.fixture.grow(self.SIZES[0])
+        # Warm per-process caches such as content types before anything is counted
+        self.walk()
+        baseline = self.walk()
+        for size in self.SIZES[1:]:
+            self.fixture.grow(size)
+            for (name, role, method), (status, queries) in self.walk().items():
+                base_status, base_queries = baseline[name, role, method]
+                with self.subTest(url=name, role=role, method=method, size=size):
+                    self.assertExpectedStatus(name, role, method, status)
+                    self.assertEqual(status, base_status)
+                    grown = [
+                        shape for shape, origins in queries.shapes.items()
+                        if len(origins) > len(base_queries.shapes.get(shape, ()))
+                    ]
+                    self.assertEqual(
+                        queries.count, base_queries.count,
+                        f'{method} {name} as {role}: {base_queries.count} queries with {self.SIZES[0]} rows, '
+                        f'{queries.count} with {size}; repeated: {grown}',
+                    )
+
+    def test_query_counts_stay_within_budget(self):
+        self.fixture.grow(self.SIZES[-1])
+        self.walk()
+        for (name, role, method), (status, queries) in self.walk().items():
+            budget = settings.QUERY_BUDGETS.get(name, settings.QUERY_BUDGET_DEFAULT)
+            with self.subTest(url=name, role=role, method=method):
+                self.assertExpectedStatus(name, role, method, status)
+                self.assertLessEqual(queries.count, budget, f'{method} {name} as {role} ran {queries.count} queries')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SearchPaginationTests(TestCase):
+    """Search results page by (rank, created_at, id) without repeating or skipping tied rows."""
+
+    def test_tied_ranks_page_through_every_result_once(self):
+        category = Category.objects.create(name='Cats', slug='cats')
+        subcategory = SubCategory.objects.create(category=category, name='Cat Food', slug='cat-food')
+        for n in range(30):
+            # Identical text ranks identically; a few rank differently to mix tied and distinct ranks
+            Product.objects.create(
+                subcategory=subcategory, name='Tied Kibble', slug=f'tied-kibble-{n}', price=Decimal('1.00'),
+                description='Kibble kibble kibble.' if n % 7 else 'Plain.',
+            )
+        # Tie created_at too, so only the id tells rows apart
+        Product.objects.update(created_at=timezone.now())
+
+        expected = list(search_products('kibble').values_list('pk', flat=True).order_by('-rank', '-created_at', '-id'))
+        seen, cursor = [], None
+        while True:
+            page = CursorPaginator(search_products('kibble'), 4, ordering=('-rank', '-created_at', '-id')).get_page(cursor)
+            seen += [product.pk for product in page]
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(expected), 30)
+        self.assertEqual(seen, expected)
+
+        # And back again from the last page
+        back = [product.pk for product in page]
+        while page.has_previous():
+            page = CursorPaginator(search_products('kibble'), 4, ordering=('-rank', '-created_at', '-id')).get_page(page.previous_cursor)
+            back = [product.pk for product in page] + back
+        self.assertEqual(back, expected)
+
+
+class ImageMetadataTests(TestCase):
+    """The image job strips EXIF from stored originals without touching their pixels."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        patcher = override_settings(
+            MEDIA_ROOT=media_root, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        category = Category.objects.create(name='Cats', slug='cats')
+        self.subcategory = SubCategory.objects.create(category=category, name='Cat Food', slug='cat-food')
+
+    def photo(self, fmt='JPEG'):
+        """A 40x20 image with a GPS position and a comment, rotated 90 degrees by its EXIF orientation."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {2: (23.0, 48.0, 0.0)}
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, fmt, exif=exif, comment=b'Taken at home', xmp=b'<x:xmpmeta/>')
+        return buffer.getvalue()
+
+    def assertStripped(self, data, original, orientation=6):
+        image = Image.open(BytesIO(data))
+        self.assertEqual(dict(image.getexif()), {0x0112: orientation} if orientation else {})
+        self.assertFalse({'comment', 'xmp', 'XML:com.adobe.xmp'}.intersection(image.info))
+        # The pixels are copied, not re-encoded
+        self.assertEqual(image.tobytes(), Image.open(BytesIO(original)).tobytes())
+
+    def test_upload_is_stripped_by_the_image_job(self):
+        original = self.photo()
+        upload = SimpleUploadedFile('kibble.jpg', original, content_type='image/jpeg')
+        product = Product.objects.create(subcategory=self.subcategory, name='Kibble', slug='kibble', price=Decimal('1.00'), image=upload)
+        # The upload is stored as is; the request does not wait on the strip
+        with product.image.open('rb') as stored:
+            self.assertEqual(stored.read(), original)
+
+        job = ImageJob.objects.get(object_id=product.pk)
+        self.assertEqual(run_job(job.pk), (job.pk, True))
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants['source'], product.image.name)
+        with product.image.open('rb') as stored:
+            stripped = stored.read()
+        self.assertStripped(stripped, original)
+        scans = original.index(b'\xff\xda')
+        self.assertEqual(stripped[stripped.index(b'\xff\xda'):], original[scans:])
+
+    def test_png_and_webp_lose_their_metadata(self):
+        for fmt, orientation in [('PNG', 6), ('WEBP', None)]:
+            with self.subTest(fmt):
+                original = self.photo(fmt)
+                self.assertStripped(strip_metadata(original), original, orientation)
+
+    def test_clean_and_unknown_files_are_left_alone(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, 'JPEG')
+        self.assertIsNone(strip_metadata(buffer.getvalue()))
+        self.assertIsNone(strip_metadata(self.photo('GIF')))
+        self.assertIsNone(strip_metadata(self.photo()[:100]))
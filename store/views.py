@@ -1,83 +1,119 @@
-from django.shortcuts import render, get_object_or_404, redirect
+import hashlib
+import mimetypes
+import posixpath
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Avg
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from PIL import Image
+from .autocomplete import suggest
+from .caching import HOME_FRAGMENT_TIMEOUT, acatalog_key, aget_catalog_version
+from .context_processors import aload_context
 from .models import Category, SubCategory, Product, Review, Wishlist, CarouselImage
+from .pagination import CursorPaginator
+from .resize import ResizeCache, can_resize
+from .search import search_products
+from .shopper import aget_shopper_state
 from .forms import ReviewForm
 
 
-def home(request):
-    """Homepage with featured products and carousel."""
-    categories = Category.objects.filter(is_active=True)
+async def _arender(request, template_name, context):
+    """render() from an async view.
+
+    Templates may still touch the ORM (related objects, cache fragment
+    misses), so rendering runs in a worker thread rather than on the event
+    loop. aload_context() has already loaded what the context processors read.
+    """
+    await aload_context(request)
+    return await sync_to_async(render)(request, template_name, context)
+
+async def home(request):
+    """Homepage with featured products and carousel.
+
+    The carousel, category tiles and featured grid are user-invariant and
+    rendered from cached fragments keyed on the catalog version, so these
+    lazy querysets only hit the database when a fragment is rebuilt. Cart
+    and wishlist state is layered on by base.html from the shopper context.
+    """
     featured_products = Product.objects.filter(is_available=True).order_by('-created_at')[:8]
     carousel_images = CarouselImage.objects.filter(is_active=True).order_by('order', '-created_at')
 
     context = {
-        'categories': categories,
         'featured_products': featured_products,
         'carousel_images': carousel_images,
+        'catalog_version': await aget_catalog_version(),
+        'fragment_timeout': HOME_FRAGMENT_TIMEOUT,
     }
-    return render(request, 'store/home.html', context)
+    return await _arender(request, 'store/home.html', context)
 
-def category_detail(request, category_slug):
+async def category_detail(request, category_slug):
     """List all products within a category, paginated."""
-    category = get_object_or_404(Category, slug=category_slug, is_active=True)
-    subcategories = category.subcategories.filter(is_active=True)
+    category = await aget_object_or_404(Category, slug=category_slug, is_active=True)
+    subcategories = [sub async for sub in category.subcategories.filter(is_active=True)]
 
-    products_qs = Product.objects.filter(
-        subcategory__category=category, is_available=True
-    ).order_by('-created_at')
-    paginator = Paginator(products_qs, 12)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    products_qs = Product.objects.filter(subcategory__category=category, is_available=True)
+    paginator = CursorPaginator(products_qs, 12, count_cache_key=await acatalog_key(f'count:category:{category.pk}'))
+    page_obj = await paginator.aget_page(request.GET.get('cursor'))
 
     context = {
         'category': category,
         'subcategories': subcategories,
         'products': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
-    return render(request, 'store/category_detail.html', context)
+    return await _arender(request, 'store/category_detail.html', context)
 
-def subcategory_detail(request, category_slug, subcategory_slug):
+async def subcategory_detail(request, category_slug, subcategory_slug):
     """List all products within a subcategory, paginated."""
-    category = get_object_or_404(Category, slug=category_slug, is_active=True)
-    subcategory = get_object_or_404(SubCategory, slug=subcategory_slug, category=category, is_active=True)
+    category = await aget_object_or_404(Category, slug=category_slug, is_active=True)
+    subcategory = await aget_object_or_404(SubCategory, slug=subcategory_slug, category=category, is_active=True)
 
-    products_qs = Product.objects.filter(
-        subcategory=subcategory, is_available=True
-    ).order_by('-created_at')
-    paginator = Paginator(products_qs, 12)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    products_qs = Product.objects.filter(subcategory=subcategory, is_available=True)
+    paginator = CursorPaginator(products_qs, 12, count_cache_key=await acatalog_key(f'count:subcategory:{subcategory.pk}'))
+    page_obj = await paginator.aget_page(request.GET.get('cursor'))
 
     context = {
         'category': category,
         'subcategory': subcategory,
         'products': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
     }
-    return render(request, 'store/subcategory_detail.html', context)
+    return await _arender(request, 'store/subcategory_detail.html', context)
 
-def product_detail(request, product_slug):
+async def product_detail(request, product_slug):
     """Product page with images, reviews, rating, and add-to-cart/wishlist."""
-    product = get_object_or_404(Product, slug=product_slug, is_available=True)
-    related_products = Product.objects.filter(subcategory=product.subcategory).exclude(id=product.id)[:4]
+    product = await aget_object_or_404(
+        Product.objects.select_related('subcategory__category').prefetch_related('images'),
+        slug=product_slug, is_available=True,
+    )
+    related_products = [
+        related async for related in
+        Product.objects.filter(subcategory_id=product.subcategory_id).exclude(id=product.id)[:4]
+    ]
     
     # Get reviews with comments
-    reviews = product.reviews.exclude(comment='').order_by('-created_at')
+    reviews = [
+        review async for review in
+        product.reviews.exclude(comment='').select_related('user').order_by('-created_at')
+    ]
     avg_rating = product.get_average_rating()
+    user = await request.auser()
     
     # Review form
-    if request.method == 'POST' and request.user.is_authenticated:
+    if request.method == 'POST' and user.is_authenticated:
         form = ReviewForm(request.POST)
         if form.is_valid():
-            _, created = Review.objects.update_or_create(
+            _, created = await Review.objects.aupdate_or_create(
                 product=product,
-                user=request.user,
+                user=user,
                 defaults={
                     'rating': form.cleaned_data['rating'],
                     'comment': form.cleaned_data['comment'],
@@ -94,11 +130,8 @@ def product_detail(request, product_slug):
         form = ReviewForm()
     
     # Check if product is in user's wishlist
-    in_wishlist = False
-    if request.user.is_authenticated:
-        wishlist = Wishlist.objects.filter(user=request.user).first()
-        if wishlist and product in wishlist.products.all():
-            in_wishlist = True
+    shopper = await aget_shopper_state(request)
+    in_wishlist = product.id in shopper.wishlist_ids
     
     context = {
         'product': product,
@@ -108,36 +141,69 @@ def product_detail(request, product_slug):
         'review_form': form,
         'in_wishlist': in_wishlist,
     }
-    return render(request, 'store/product_detail.html', context)
+    return await _arender(request, 'store/product_detail.html', context)
 
-def search(request):
-    """Search products by name, description, subcategory, or category."""
+async def search(request):
+    """Search products by name, description, subcategory, or category, ranked by relevance."""
     query = request.GET.get('q', '')
     page_obj = None
 
     if query:
-        products_qs = Product.objects.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(subcategory__name__icontains=query) |
-            Q(subcategory__category__name__icontains=query)
-        ).filter(is_available=True).distinct().order_by('-created_at')
-        paginator = Paginator(products_qs, 12)
-        page_obj = paginator.get_page(request.GET.get('page'))
+        products_qs = search_products(query).filter(is_available=True).select_related('subcategory__category')
+        query_hash = hashlib.md5(query.encode()).hexdigest()
+        paginator = CursorPaginator(
+            products_qs, 12, ordering=('-rank', '-created_at', '-id'),
+            count_cache_key=await acatalog_key(f'count:search:{query_hash}'),
+        )
+        page_obj = await paginator.aget_page(request.GET.get('cursor'))
 
     context = {
         'products': page_obj,
         'page_obj': page_obj,
-        'page_param': 'page',
+        'page_param': 'cursor',
         'query': query,
     }
-    return render(request, 'store/search_results.html', context)
+    return await _arender(request, 'store/search_results.html', context)
+
+def autocomplete(request):
+    """Product and subcategory name suggestions for a search prefix (JSON or HTMX partial)."""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except (ValueError, TypeError):
+        limit = 8
+
+    suggestions = suggest(query, limit) if query else []
+
+    if request.headers.get('HX-Request'):
+        return render(request, 'store/_autocomplete.html', {'suggestions': suggestions, 'query': query})
+    return JsonResponse({'results': suggestions})
+
+def resized_image(request, width, path):
+    """Serve a media image scaled down to an allowed width, rendering it on first request.
+
+    Rendered variants land in the resize cache under the same path as this
+    URL, so nginx serves every later request without reaching Django.
+    """
+    name = posixpath.normpath(path)
+    if (width not in settings.IMAGE_RESIZE_WIDTHS or not can_resize(name)
+            or name.startswith(('../', '/')) or not default_storage.exists(name)):
+        raise Http404("No such image size")
+
+    try:
+        cached_path = ResizeCache().get_or_create(width, name)
+    except (OSError, Image.DecompressionBombError):
+        raise Http404("Image could not be resized")
+
+    response = FileResponse(open(cached_path, 'rb'), content_type=mimetypes.guess_type(name)[0])
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
 
 @login_required
 def wishlist(request):
     """Display the user's saved wishlist products."""
     wishlist_obj, created = Wishlist.objects.get_or_create(user=request.user)
-    products = wishlist_obj.products.all().order_by('-id')
+    products = wishlist_obj.products.select_related('subcategory').order_by('-id')
 
     context = {
         'wishlist': wishlist_obj,